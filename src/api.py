@@ -0,0 +1,172 @@
+import os
+import json
+import asyncio
+import argparse
+import logging
+from email.parser import BytesParser
+from email.policy import HTTP
+from concurrent.futures import ProcessPoolExecutor
+import ocr_cache
+import pipeline
+import profiling
+from batch import _init_worker
+from preprocess import PREPROCESS_MODES
+from ocr import OCR_BACKENDS
+from render import RENDERERS, DPI_MODES, PDF_ERRORS
+from triage import TRIAGE_MODES
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+           413: "Payload Too Large", 415: "Unsupported Media Type", 422: "Unprocessable Entity",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _extract_upload(pdf_bytes, name):
+    invoice_data, verifiability_report = pipeline.extract_from_bytes(pdf_bytes, name)
+    return {"file": name, "invoice": invoice_data, "verification": verifiability_report}
+
+def read_pdf_body(headers, body):
+    content_type = headers.get("content-type", "application/pdf")
+    name = "upload"
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        parts = [part for part in message.iter_parts() if part.get_filename() or part.get_content_type() == "application/pdf"]
+        if not parts:
+            raise HTTPError(400, "No file part in multipart upload")
+        name = os.path.splitext(os.path.basename(parts[0].get_filename() or name))[0]
+        body = parts[0].get_payload(decode=True) or b""
+    elif not content_type.startswith(("application/pdf", "application/octet-stream")):
+        raise HTTPError(415, f"Unsupported content type '{content_type}'")
+    if not body.startswith(b"%PDF"):
+        raise HTTPError(415, "Upload is not a PDF")
+    return name, body
+
+class ExtractionServer:
+    def __init__(self, executor, concurrency):
+        self.executor = executor
+        self.slots = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.active = 0
+
+    async def read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, f"Headers exceed {MAX_HEADER_BYTES} bytes")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        return method, target.split("?", 1)[0], headers
+
+    async def read_body(self, reader, headers):
+        if "content-length" not in headers:
+            raise HTTPError(411, "Content-Length required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Malformed Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Malformed Content-Length")
+        if length > MAX_UPLOAD_BYTES:
+            raise HTTPError(413, f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+        return await reader.readexactly(length)
+
+    async def extract(self, reader, headers):
+        async with self.slots:
+            self.active += 1
+            try:
+                name, pdf_bytes = read_pdf_body(headers, await self.read_body(reader, headers))
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, _extract_upload, pdf_bytes, name)
+            except (ValueError, *PDF_ERRORS) as e:
+                raise HTTPError(422, str(e))
+            finally:
+                self.active -= 1
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, path, headers = await self.read_request(reader)
+                if path == "/health":
+                    status, payload = 200, {"status": "ok", "active": self.active, "concurrency": self.concurrency}
+                elif path != "/extract":
+                    raise HTTPError(404, f"No route for {path}")
+                elif method != "POST":
+                    raise HTTPError(405, "Use POST /extract")
+                else:
+                    status, payload = 200, await self.extract(reader, headers)
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            except Exception as e:
+                logging.error(f"Extraction failed: {str(e)}", exc_info=True)
+                status, payload = 500, {"error": str(e)}
+            await self.respond(writer, status, payload)
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload):
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+def start_workers(executor, workers):
+    for future in [executor.submit(os.getpid) for _ in range(workers)]:
+        future.result()
+
+async def serve(host, port, concurrency, workers):
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(ocr_cache.settings(), pipeline.settings(), profiling.enabled()))
+    start_workers(executor, workers)
+    server = ExtractionServer(executor, concurrency)
+    try:
+        async with await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_BYTES) as listener:
+            logging.info(f"Serving POST /extract on http://{host}:{port} (concurrency {concurrency}, {workers} workers)")
+            await listener.serve_forever()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve invoice extraction over HTTP: POST a PDF to /extract.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=2, help="Documents extracted at once; further uploads wait")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes for extraction (0 = --concurrency)")
+    parser.add_argument("--preprocess", choices=PREPROCESS_MODES, default="full")
+    parser.add_argument("--ocr-backend", choices=OCR_BACKENDS, default="auto")
+    parser.add_argument("--renderer", choices=RENDERERS, default="auto")
+    parser.add_argument("--dpi-mode", choices=DPI_MODES, default="fixed")
+    parser.add_argument("--no-text-layer", action="store_true", help="OCR every page even when it has a usable text layer")
+    parser.add_argument("--triage", choices=TRIAGE_MODES, default="off")
+    parser.add_argument("--ocr-mode", choices=("page", "roi"), default="page")
+    parser.add_argument("--ocr-cache-dir", help="Share an OCR cache across requests; off by default so nothing is written per request")
+    args = parser.parse_args(argv)
+
+    pipeline.configure(preprocess_mode=args.preprocess, ocr_backend=args.ocr_backend, renderer=args.renderer,
+                       dpi_mode=args.dpi_mode, text_layer=not args.no_text_layer,
+                       triage=args.triage, ocr_mode=args.ocr_mode)
+    ocr_cache.configure(args.ocr_cache_dir)
+    concurrency = max(1, args.concurrency)
+    try:
+        asyncio.run(serve(args.host, args.port, concurrency, args.workers or concurrency))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
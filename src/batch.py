@@ -0,0 +1,107 @@
+import os
+import time
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import ocr_cache
+import pipeline
+import profiling
+from pipeline import count_pages, render_page, process_page, page_seal, finalize_document
+
+def _init_worker(cache_settings, pipeline_settings, profile=False):
+    ocr_cache.configure(*cache_settings)
+    pipeline.configure(**pipeline_settings)
+    if profile:
+        profiling.enable()
+
+def _page_task(pdf_path, page_number, is_last):
+    before = ocr_cache.stats()
+    profiling.set_document(os.path.splitext(os.path.basename(pdf_path))[0])
+    image_np, render_info = render_page(pdf_path, page_number, need_image=is_last)
+    elements, page_info = process_page(image_np, page_number, render_info)
+    seal = None
+    if is_last and page_info["source"] != "skipped":
+        seal = page_seal([elements], image_np, [page_info], pdf_path)
+    cache_stats = {k: v - before.get(k, 0) for k, v in ocr_cache.stats().items()}
+    return elements, page_info, seal, cache_stats, profiling.drain()
+
+def _seal_task(pdf_path, elements, page_info):
+    profiling.set_document(os.path.splitext(os.path.basename(pdf_path))[0])
+    return page_seal([elements], None, [page_info], pdf_path), profiling.drain()
+
+def _submit_document(pool, pdf_path):
+    page_count = count_pages(pdf_path)
+    return [pool.submit(_page_task, pdf_path, n, n == page_count) for n in range(1, page_count + 1)]
+
+def _finalize_document(pool, pdf_path, futures, output_dir, cache_stats, writer=None):
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    all_elements = []
+    page_infos = []
+    seal = None
+    with profiling.document(base_name):
+        for future in futures:
+            elements, page_info, page_seal_result, page_cache_stats, page_profile = future.result()
+            for k, v in page_cache_stats.items():
+                cache_stats[k] = cache_stats.get(k, 0) + v
+            profiling.merge(*page_profile)
+            all_elements.append(elements)
+            page_infos.append(page_info)
+            seal = page_seal_result
+        if seal is None:
+            kept = [i for i, info in enumerate(page_infos) if info["source"] != "skipped"]
+            if kept and any(all_elements):
+                seal, seal_profile = pool.submit(_seal_task, pdf_path, all_elements[kept[-1]], page_infos[kept[-1]]).result()
+                profiling.merge(*seal_profile)
+        finalize_document(all_elements, None, output_dir, base_name, page_infos, writer, pdf_path, seal)
+    logging.info(f"Processed {base_name}.pdf successfully")
+    return len(futures)
+
+def run_batch(pdf_paths, output_dir, workers=None, writer=None):
+    workers = workers or os.cpu_count() or 1
+    window = workers * 2
+    results = []
+    total_pages = 0
+    cache_stats = {}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(ocr_cache.settings(), pipeline.settings(), profiling.enabled())) as pool:
+        pending = deque()
+        paths = iter(pdf_paths)
+
+        def fill():
+            while len(pending) < window:
+                pdf_path = next(paths, None)
+                if pdf_path is None:
+                    return
+                try:
+                    pending.append((pdf_path, _submit_document(pool, pdf_path), None))
+                except Exception as e:
+                    pending.append((pdf_path, None, e))
+
+        fill()
+        while pending:
+            pdf_path, futures, error = pending.popleft()
+            try:
+                if error is not None:
+                    raise error
+                total_pages += _finalize_document(pool, pdf_path, futures, output_dir, cache_stats, writer)
+                results.append((pdf_path, True))
+            except Exception as e:
+                logging.error(f"Error processing {pdf_path}: {str(e)}", exc_info=True)
+                for future in futures or []:
+                    future.cancel()
+                results.append((pdf_path, False))
+            fill()
+
+    elapsed = time.perf_counter() - start
+    succeeded = sum(1 for _, ok in results if ok)
+    logging.info(
+        f"Batch complete: {succeeded}/{len(results)} documents, {total_pages} pages in {elapsed:.1f}s "
+        f"({succeeded / elapsed if elapsed else 0.0:.2f} docs/sec, "
+        f"{total_pages / elapsed if elapsed else 0.0:.2f} pages/sec) using {workers} workers"
+    )
+    if cache_stats:
+        logging.info(f"OCR cache: {cache_stats.get('hits', 0)} hits, {cache_stats.get('misses', 0)} misses, "
+                     f"{cache_stats.get('evictions', 0)} evictions")
+    return results
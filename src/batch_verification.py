@@ -0,0 +1,87 @@
+import os
+import re
+import json
+from collections import defaultdict
+
+NOT_FOUND = "Not Found"
+BATCH_REPORT_NAME = "batch_verification_report.json"
+
+def normalize_key(value):
+    if value is None or value == NOT_FOUND:
+        return ""
+    return re.sub(r'[^0-9a-z]', '', str(value).lower())
+
+def invoice_keys(base_name, invoice_data):
+    general = invoice_data.get("general_information", {})
+    vendor = invoice_data.get("vendor_information", {})
+    totals = invoice_data.get("totals", {})
+    gst = normalize_key(general.get("supplier_gst_number"))
+    vendor_name = normalize_key(vendor.get("company_name"))
+    final_total = totals.get("final_total") or 0.0
+    return {
+        "file": base_name,
+        "suppliers": [key for key in (gst, vendor_name) if key] or [""],
+        "vendor_name": vendor_name,
+        "supplier_gst": gst,
+        "invoice_number": normalize_key(general.get("invoice_number")),
+        "invoice_date": normalize_key(general.get("invoice_date")),
+        "final_total": round(float(final_total), 2) if final_total else 0.0,
+    }
+
+def verify_batch(records):
+    by_number = defaultdict(list)
+    by_amount = defaultdict(list)
+    gst_by_vendor = defaultdict(lambda: defaultdict(list))
+
+    for keys in records:
+        for supplier in keys["suppliers"]:
+            if keys["invoice_number"]:
+                by_number[(supplier, keys["invoice_number"])].append(keys["file"])
+            if keys["invoice_date"] and keys["final_total"]:
+                by_amount[(supplier, keys["invoice_date"], keys["final_total"])].append(keys["file"])
+        if keys["vendor_name"] and keys["supplier_gst"]:
+            gst_by_vendor[keys["vendor_name"]][keys["supplier_gst"]].append(keys["file"])
+
+    report = {
+        "documents": len(records),
+        "duplicate_invoice_numbers": [],
+        "possible_double_submissions": [],
+        "gst_inconsistencies": [],
+        "summary": {"issues": []}
+    }
+    issues = report["summary"]["issues"]
+    reported = set()
+
+    for (supplier, number), files in by_number.items():
+        if len(files) > 1 and ("number", number, frozenset(files)) not in reported:
+            reported.add(("number", number, frozenset(files)))
+            report["duplicate_invoice_numbers"].append({"supplier": supplier, "invoice_number": number, "files": files})
+            issues.append(f"Invoice number {number} appears {len(files)} times for supplier '{supplier or 'unknown'}': {', '.join(files)}")
+
+    for (supplier, date, total), files in by_amount.items():
+        if len(files) > 1 and ("amount", date, total, frozenset(files)) not in reported:
+            reported.add(("amount", date, total, frozenset(files)))
+            report["possible_double_submissions"].append({"supplier": supplier, "invoice_date": date, "final_total": total, "files": files})
+            issues.append(f"Same date {date} and total {total} for supplier '{supplier or 'unknown'}': {', '.join(files)}")
+
+    for vendor, numbers in gst_by_vendor.items():
+        if len(numbers) > 1:
+            report["gst_inconsistencies"].append({"vendor": vendor, "gst_numbers": {gst: files for gst, files in numbers.items()}})
+            issues.append(f"Vendor '{vendor}' uses {len(numbers)} different GST numbers")
+
+    report["summary"]["duplicates_found"] = bool(report["duplicate_invoice_numbers"] or report["possible_double_submissions"])
+    report["summary"]["gst_consistent"] = not report["gst_inconsistencies"]
+    return report
+
+class BatchVerificationSink:
+    def __init__(self, output_dir, name=BATCH_REPORT_NAME):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, name)
+        self.records = []
+
+    def write(self, base_name, invoice_data, verifiability_report, seal_image=None):
+        self.records.append(invoice_keys(base_name, invoice_data))
+
+    def close(self):
+        with open(self.path, 'w') as f:
+            json.dump(verify_batch(self.records), f, indent=4)
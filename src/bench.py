@@ -0,0 +1,219 @@
+import os
+import re
+import json
+import time
+import resource
+import argparse
+import tempfile
+from collections import defaultdict
+import ocr_cache
+import pipeline
+import profiling
+from pipeline import iter_pages, process_page, finalize_document
+from preprocess import PREPROCESS_MODES, preprocess_with_info
+from ocr import OCR_BACKENDS
+from render import RENDERERS, DPI_MODES
+from triage import TRIAGE_MODES
+from invoice_parser import parse_invoice_data
+from verification import perform_verifiability_checks
+from confidence import ConfidenceIndex
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+STAGES = ("rasterize", "preprocess", "ocr", "parse", "verify", "output")
+INDEX_PATTERN = re.compile(r'\[\d+\]')
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f"{prefix}.{key}" if prefix else key))
+        return items
+    if isinstance(value, list):
+        items = {}
+        for i, child in enumerate(value):
+            items.update(flatten(child, f"{prefix}[{i}]"))
+        return items
+    return {prefix: value}
+
+def same_value(a, b):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool) and not isinstance(b, bool):
+        return abs(float(a) - float(b)) < 0.005
+    return str(a).strip() == str(b).strip()
+
+def field_agreement(invoice_data, reference, skip=()):
+    produced = flatten(invoice_data)
+    matches = defaultdict(lambda: [0, 0])
+    for key, expected in flatten(reference).items():
+        field = INDEX_PATTERN.sub('[]', key)
+        if field in skip:
+            continue
+        matches[field][1] += 1
+        if key in produced and same_value(produced[key], expected):
+            matches[field][0] += 1
+    return matches
+
+def run_document(pdf_path, stage, output_dir):
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    until = STAGES.index(stage)
+    all_elements = []
+    last_image = None
+    pages = 0
+    with profiling.document(base_name):
+        for page_number, image_np, render_info in iter_pages(pdf_path):
+            pages += 1
+            if image_np is not None:
+                last_image = image_np
+            if until < STAGES.index("preprocess"):
+                continue
+            if until < STAGES.index("ocr"):
+                if "elements" not in render_info:
+                    with profiling.stage("preprocess", page_number):
+                        preprocess_with_info(image_np, pipeline.SETTINGS["preprocess_mode"], render_info.get("layout"))
+                continue
+            elements, _ = process_page(image_np, page_number, render_info)
+            all_elements.append(elements)
+
+        if until < STAGES.index("parse"):
+            return pages, None
+        if stage == "output":
+            invoice_data, _ = finalize_document(all_elements, last_image, output_dir, base_name, pdf=pdf_path)
+            return pages, invoice_data
+        with profiling.stage("parse"):
+            invoice_data = parse_invoice_data(all_elements)
+        if stage == "verify":
+            with profiling.stage("verify"):
+                perform_verifiability_checks(invoice_data, ConfidenceIndex.from_pages(all_elements),
+                                             pipeline.SETTINGS["abs_tolerance"], pipeline.SETTINGS["rel_tolerance"])
+        return pages, invoice_data
+
+def run_benchmark(pdf_paths, stage, reference_dir):
+    profiler = profiling.enable()
+    profiler.drain()
+    matches = defaultdict(lambda: [0, 0])
+    skip = () if stage == "output" else ("general_information.seal_and_sign_present",)
+    documents = []
+    total_pages = 0
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as output_dir:
+        for pdf_path in pdf_paths:
+            base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+            doc_start = time.perf_counter()
+            try:
+                pages, invoice_data = run_document(pdf_path, stage, output_dir)
+                error = None
+            except Exception as e:
+                pages, invoice_data, error = 0, None, str(e)
+            total_pages += pages
+            record = {"file": base_name, "pages": pages, "seconds": time.perf_counter() - doc_start, "error": error}
+            reference_path = os.path.join(reference_dir, f"extracted_data_{base_name}.json")
+            if invoice_data is not None and os.path.exists(reference_path):
+                with open(reference_path) as f:
+                    doc_matches = field_agreement(invoice_data, json.load(f), skip)
+                agreed = sum(m[0] for m in doc_matches.values())
+                compared = sum(m[1] for m in doc_matches.values())
+                record["agreement"] = agreed / compared if compared else None
+                for field, (hit, total) in doc_matches.items():
+                    matches[field][0] += hit
+                    matches[field][1] += total
+            documents.append(record)
+    elapsed = time.perf_counter() - start
+
+    agreed = sum(m[0] for m in matches.values())
+    compared = sum(m[1] for m in matches.values())
+    return {
+        "stage": stage,
+        "settings": pipeline.settings(),
+        "documents": documents,
+        "pages": total_pages,
+        "wall_seconds": elapsed,
+        "pages_per_second": total_pages / elapsed if elapsed else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "agreement": agreed / compared if compared else None,
+        "field_agreement": {field: hit / total for field, (hit, total) in sorted(matches.items())},
+        "stages": profiler.summary(),
+    }
+
+def print_run(result):
+    agreement = result["agreement"]
+    print(f"stage={result['stage']} documents={len(result['documents'])} pages={result['pages']} "
+          f"wall={result['wall_seconds']:.2f}s pages/sec={result['pages_per_second']:.2f} "
+          f"peak_rss={result['peak_rss_mb']:.0f}MB agreement={'n/a' if agreement is None else f'{agreement:.1%}'}")
+    print(f"{'stage':<12}{'count':>7}{'total ms':>11}{'p50 ms':>10}{'p95 ms':>10}")
+    for row in result["stages"]:
+        print(f"{row['stage']:<12}{row['count']:>7}{row['total_ms']:>11.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    failed = [d for d in result["documents"] if d["error"]]
+    for doc in failed:
+        print(f"failed: {doc['file']}: {doc['error']}")
+    weak = [(field, score) for field, score in result["field_agreement"].items() if score < 1.0]
+    for field, score in sorted(weak, key=lambda item: item[1])[:10]:
+        print(f"  {field:<55}{score:>7.1%}")
+
+def _delta(before, after):
+    if before is None or after is None:
+        return "n/a"
+    if not before:
+        return f"{after - before:+.3f}"
+    return f"{(after - before) / before:+.1%}"
+
+def compare_runs(base, other):
+    print(f"{'metric':<22}{'base':>12}{'new':>12}{'change':>10}")
+    for metric in ("wall_seconds", "pages_per_second", "peak_rss_mb", "agreement"):
+        a, b = base.get(metric), other.get(metric)
+        fmt = (lambda v: "n/a" if v is None else f"{v:.3f}")
+        print(f"{metric:<22}{fmt(a):>12}{fmt(b):>12}{_delta(a, b):>10}")
+    base_stages = {row["stage"]: row for row in base["stages"]}
+    for row in other["stages"]:
+        before = base_stages.get(row["stage"])
+        for key in ("p50_ms", "p95_ms"):
+            a = before[key] if before else None
+            print(f"{row['stage'] + ' ' + key:<22}{'n/a' if a is None else f'{a:.1f}':>12}{row[key]:>12.1f}{_delta(a, row[key]):>10}")
+    base_fields, other_fields = base["field_agreement"], other["field_agreement"]
+    for field in sorted(set(base_fields) | set(other_fields)):
+        a, b = base_fields.get(field), other_fields.get(field)
+        if a != b:
+            print(f"  {field:<55}{'n/a' if a is None else f'{a:.1%}':>8} -> {'n/a' if b is None else f'{b:.1%}'}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure pipeline throughput, memory and field agreement on a fixed PDF subset.")
+    parser.add_argument("--input-dir", default=os.path.join(BASE_DIR, "samples"))
+    parser.add_argument("--reference-dir", default=os.path.join(BASE_DIR, "output"),
+                        help="Directory holding the committed extracted_data_<name>.json used for field agreement")
+    parser.add_argument("--limit", type=int, default=8, help="Benchmark the first N PDFs in sorted order")
+    parser.add_argument("--stage", choices=STAGES, default="output",
+                        help="Run the pipeline up to and including this stage; 'output' is the full pipeline")
+    parser.add_argument("--preprocess", choices=PREPROCESS_MODES, default="full")
+    parser.add_argument("--ocr-backend", choices=OCR_BACKENDS, default="auto")
+    parser.add_argument("--renderer", choices=RENDERERS, default="auto")
+    parser.add_argument("--dpi-mode", choices=DPI_MODES, default="fixed")
+    parser.add_argument("--no-text-layer", action="store_true", help="OCR every page even when it has a usable text layer")
+    parser.add_argument("--triage", choices=TRIAGE_MODES, default="off")
+    parser.add_argument("--ocr-mode", choices=("page", "roi"), default="page")
+    parser.add_argument("--ocr-cache-dir", help="Use this OCR cache; by default the benchmark always runs Tesseract")
+    parser.add_argument("--save", help="Write the run as JSON for later comparison")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two saved runs instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        runs = []
+        for path in args.compare:
+            with open(path) as f:
+                runs.append(json.load(f))
+        compare_runs(*runs)
+        return
+
+    pipeline.configure(preprocess_mode=args.preprocess, ocr_backend=args.ocr_backend, renderer=args.renderer,
+                       dpi_mode=args.dpi_mode, text_layer=not args.no_text_layer,
+                       triage=args.triage, ocr_mode=args.ocr_mode)
+    ocr_cache.configure(args.ocr_cache_dir)
+    pdf_files = sorted(f for f in os.listdir(args.input_dir) if f.lower().endswith(".pdf"))[:args.limit]
+    if not pdf_files:
+        raise FileNotFoundError(f"No PDF files found in '{args.input_dir}'")
+
+    result = run_benchmark([os.path.join(args.input_dir, f) for f in pdf_files], args.stage, args.reference_dir)
+    print_run(result)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
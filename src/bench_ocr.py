@@ -0,0 +1,67 @@
+import os
+import time
+import argparse
+import numpy as np
+import ocr
+import pipeline
+from pipeline import iter_pages
+from preprocess import preprocess_image
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+def load_pages(input_dir, max_pages):
+    pages = []
+    for pdf_file in sorted(f for f in os.listdir(input_dir) if f.lower().endswith(".pdf")):
+        for _, image_np, _ in iter_pages(os.path.join(input_dir, pdf_file)):
+            pages.append(preprocess_image(image_np))
+            if len(pages) >= max_pages:
+                return pages
+    return pages
+
+def benchmark_backend(name, pages):
+    ocr.set_backend(name)
+    if ocr.backend_name() != name:
+        return None
+    start = time.perf_counter()
+    ocr.extract_text_with_positions(pages[0])
+    first_call = time.perf_counter() - start
+    latencies = []
+    words = 0
+    for page in pages:
+        start = time.perf_counter()
+        words += len(ocr.extract_text_with_positions(page))
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    return {
+        "backend": name,
+        "pages": len(pages),
+        "words": words,
+        "first_call_ms": first_call * 1000,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-page OCR latency across Tesseract backends.")
+    parser.add_argument("--input-dir", default=os.path.join(BASE_DIR, "samples"))
+    parser.add_argument("--pages", type=int, default=8, help="Number of preprocessed pages to OCR per backend")
+    parser.add_argument("--backends", default="subprocess,tesserocr", help="Comma-separated backends to compare")
+    args = parser.parse_args(argv)
+
+    pipeline.configure(text_layer=False)
+    pages = load_pages(args.input_dir, args.pages)
+    if not pages:
+        raise FileNotFoundError(f"No PDF pages found in '{args.input_dir}'")
+
+    print(f"{'backend':<12}{'pages':>6}{'words':>8}{'first ms':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name in args.backends.split(","):
+        result = benchmark_backend(name.strip(), pages)
+        if result is None:
+            print(f"{name.strip():<12} unavailable")
+            continue
+        print(f"{result['backend']:<12}{result['pages']:>6}{result['words']:>8}{result['first_call_ms']:>10.1f}"
+              f"{result['mean_ms']:>10.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
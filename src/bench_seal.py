@@ -0,0 +1,65 @@
+import os
+import time
+import argparse
+import cv2
+import numpy as np
+import pipeline
+from pipeline import DPI, iter_pages, process_page
+from seal import locate_seal
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+def otsu_detector(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for contour in contours:
+        if cv2.contourArea(contour) > 1000:
+            return cv2.boundingRect(contour)
+    return None
+
+def overlap(a, b):
+    if a is None or b is None:
+        return None
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0, x1 - x0) * max(0, y1 - y0)
+    return inter / float(a[2] * a[3] + b[2] * b[3] - inter)
+
+def timed(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - start)
+    return result, float(np.median(latencies)) * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare seal detector latency and agreement on the last page of each PDF.")
+    parser.add_argument("--input-dir", default=os.path.join(BASE_DIR, "samples"))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per detector; the median is reported")
+    args = parser.parse_args(argv)
+
+    print(f"{'file':<22}{'otsu ms':>9}{'full ms':>9}{'fast ms':>9}{'speedup':>9}  otsu  full  fast  IoU(fast,full)")
+    totals = np.zeros(3)
+    for pdf_file in sorted(f for f in os.listdir(args.input_dir) if f.lower().endswith(".pdf")):
+        pages = list(iter_pages(os.path.join(args.input_dir, pdf_file)))
+        _, image_np, render_info = pages[-1]
+        elements, page_info = process_page(image_np, len(pages), render_info)
+        if page_info.get("preprocessing", {}).get("deskew") == "transformed":
+            elements = None
+        scale = render_info.get("dpi", DPI) / DPI
+
+        otsu, otsu_ms = timed(lambda: otsu_detector(image_np), args.repeat)
+        full, full_ms = timed(lambda: locate_seal(image_np, elements, "full", scale), args.repeat)
+        fast, fast_ms = timed(lambda: locate_seal(image_np, elements, "fast", scale), args.repeat)
+        totals += (otsu_ms, full_ms, fast_ms)
+        iou = overlap(fast, full)
+        print(f"{pdf_file[:21]:<22}{otsu_ms:>9.1f}{full_ms:>9.1f}{fast_ms:>9.1f}{full_ms / fast_ms:>8.1f}x"
+              f"  {'yes' if otsu else 'no':<5} {'yes' if full else 'no':<5} {'yes' if fast else 'no':<5} "
+              f"{'-' if iou is None else f'{iou:.2f}'}")
+    print(f"{'total':<22}{totals[0]:>9.1f}{totals[1]:>9.1f}{totals[2]:>9.1f}{totals[1] / totals[2]:>8.1f}x")
+
+if __name__ == "__main__":
+    pipeline.configure()
+    main()
@@ -0,0 +1,109 @@
+import re
+from collections import defaultdict
+from elements import as_page_elements
+
+TOKEN_STRIP = ".,:;!?()[]{}\"'"
+NUMBER_CHARS = re.compile(r'[^\d.,\-]')
+
+def normalize_token(token):
+    return str(token).strip().strip(TOKEN_STRIP).lower()
+
+def number_key(value):
+    return f"{float(value):.2f}"
+
+def number_candidates(token):
+    raw = NUMBER_CHARS.sub('', str(token)).strip('.,')
+    if not raw or not any(c.isdigit() for c in raw):
+        return []
+    candidates = []
+    if ',' in raw and '.' in raw:
+        if raw.rfind('.') > raw.rfind(','):
+            candidates.append(raw.replace(',', ''))
+        else:
+            candidates.append(raw.replace('.', '').replace(',', '.'))
+    elif ',' in raw:
+        candidates.append(raw.replace(',', ''))
+        if raw.count(',') == 1:
+            candidates.append(raw.replace(',', '.'))
+    else:
+        candidates.append(raw)
+    keys = []
+    for candidate in candidates:
+        try:
+            keys.append(number_key(candidate))
+        except ValueError:
+            continue
+    return keys
+
+class ConfidenceIndex:
+    def __init__(self):
+        self.words = defaultdict(list)
+        self.numbers = defaultdict(list)
+        self._word_mean = {}
+        self._number_mean = {}
+
+    @classmethod
+    def from_pages(cls, all_elements):
+        index = cls()
+        for elements in all_elements:
+            page = as_page_elements(elements)
+            for text, conf in zip(page.texts, page.boxes['confidence'].tolist()):
+                index.add(text, conf)
+        index.freeze()
+        return index
+
+    @classmethod
+    def from_mapping(cls, confidences):
+        index = cls()
+        for token, conf in confidences.items():
+            index.add(token, conf)
+        index.freeze()
+        return index
+
+    def add(self, token, confidence):
+        word = normalize_token(token)
+        if word:
+            self.words[word].append(confidence)
+        for key in number_candidates(token):
+            self.numbers[key].append(confidence)
+
+    def freeze(self):
+        self._word_mean = {k: sum(v) / len(v) for k, v in self.words.items()}
+        self._number_mean = {k: sum(v) / len(v) for k, v in self.numbers.items()}
+
+    def word(self, token):
+        return self._word_mean.get(normalize_token(token))
+
+    def number(self, value):
+        try:
+            return self._number_mean.get(number_key(value))
+        except (TypeError, ValueError):
+            return None
+
+    def lookup(self, token):
+        conf = self.word(token)
+        if conf is None:
+            for key in number_candidates(token):
+                conf = self._number_mean.get(key)
+                if conf is not None:
+                    break
+        return conf
+
+    def token_confidence(self, token, default):
+        conf = self.lookup(token)
+        return default if conf is None else conf
+
+    def text_confidence(self, text, default):
+        confs = [c for c in (self.lookup(w) for w in str(text).split()) if c is not None]
+        return sum(confs) / len(confs) if confs else default
+
+    def number_confidence(self, value, default):
+        conf = self.number(value)
+        return default if conf is None else conf
+
+def as_confidence_index(confidences):
+    if isinstance(confidences, ConfidenceIndex):
+        return confidences
+    if isinstance(confidences, dict):
+        return ConfidenceIndex.from_mapping(confidences)
+    return ConfidenceIndex.from_pages(confidences or [])
@@ -0,0 +1,130 @@
+import numpy as np
+
+ELEMENT_DTYPE = np.dtype([('x', 'i4'), ('y', 'i4'), ('width', 'i4'), ('height', 'i4'), ('confidence', 'f8')])
+FIELDS = ('text',) + ELEMENT_DTYPE.names
+
+class Element:
+    __slots__ = ('page', 'index')
+
+    def __init__(self, page, index):
+        self.page = page
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == 'text':
+            return self.page.texts[self.index]
+        return self.page.boxes[key][self.index].item()
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def get(self, key, default=None):
+        return self[key] if key in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        return {key: self[key] for key in FIELDS}
+
+    def __repr__(self):
+        return f"Element({self.to_dict()})"
+
+class PageElements:
+    __slots__ = ('texts', 'boxes')
+
+    def __init__(self, texts=(), boxes=None):
+        self.texts = list(texts)
+        self.boxes = boxes if boxes is not None else np.zeros(len(self.texts), dtype=ELEMENT_DTYPE)
+
+    @classmethod
+    def from_tesseract(cls, data, min_confidence):
+        conf = np.asarray(data['conf'], dtype=float)
+        texts = np.char.strip(np.asarray(data['text'], dtype=str))
+        keep = np.flatnonzero((np.trunc(conf) > min_confidence) & (np.char.str_len(texts) > 0))
+        boxes = np.empty(len(keep), dtype=ELEMENT_DTYPE)
+        for name in ('left', 'top', 'width', 'height'):
+            column = np.asarray(data[name], dtype=np.int32)[keep]
+            boxes[{'left': 'x', 'top': 'y'}.get(name, name)] = column
+        boxes['confidence'] = conf[keep] / 100.0
+        return cls(texts[keep].tolist(), boxes)
+
+    @classmethod
+    def from_records(cls, records):
+        if isinstance(records, PageElements):
+            return records
+        records = list(records)
+        boxes = np.empty(len(records), dtype=ELEMENT_DTYPE)
+        for name in ELEMENT_DTYPE.names:
+            boxes[name] = [r[name] for r in records]
+        return cls([r['text'] for r in records], boxes)
+
+    @classmethod
+    def from_columns(cls, columns):
+        boxes = np.empty(len(columns['text']), dtype=ELEMENT_DTYPE)
+        for name in ELEMENT_DTYPE.names:
+            boxes[name] = columns[name]
+        return cls(columns['text'], boxes)
+
+    @classmethod
+    def concat(cls, pages):
+        pages = [page for page in pages if len(page)]
+        if not pages:
+            return cls()
+        return cls([text for page in pages for text in page.texts], np.concatenate([page.boxes for page in pages]))
+
+    def shifted(self, dx, dy):
+        boxes = self.boxes.copy()
+        boxes['x'] += dx
+        boxes['y'] += dy
+        return PageElements(self.texts, boxes)
+
+    def scaled(self, factor):
+        boxes = self.boxes.copy()
+        for name in ('x', 'y', 'width', 'height'):
+            boxes[name] = np.rint(boxes[name] * factor)
+        return PageElements(self.texts, boxes)
+
+    def to_columns(self):
+        columns = {name: self.boxes[name].tolist() for name in ELEMENT_DTYPE.names}
+        columns['text'] = list(self.texts)
+        return columns
+
+    def column(self, name):
+        if name == 'text':
+            return np.asarray(self.texts, dtype=object)
+        return self.boxes[name]
+
+    def take(self, indices):
+        indices = np.asarray(indices, dtype=np.intp)
+        return PageElements([self.texts[i] for i in indices.tolist()], self.boxes[indices])
+
+    def filter(self, mask):
+        return self.take(np.flatnonzero(mask))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        for i in range(len(self.texts)):
+            yield Element(self, i)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self.texts)
+            if not 0 <= index < len(self.texts):
+                raise IndexError("element index out of range")
+            return Element(self, int(index))
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self.texts))[index])
+        index = np.asarray(index)
+        return self.filter(index) if index.dtype == bool else self.take(index)
+
+    def __repr__(self):
+        return f"PageElements({len(self)} elements)"
+
+def as_page_elements(elements):
+    if isinstance(elements, PageElements):
+        return elements
+    return PageElements.from_records(elements or [])
@@ -0,0 +1,118 @@
+import re
+import time
+import logging
+from collections import namedtuple
+
+NOT_FOUND = "Not Found"
+
+Field = namedtuple("Field", ["name", "regions", "pattern", "post"])
+
+_timings = {}
+
+def _first_group(match):
+    return next(group for group in match.groups() if group is not None).strip()
+
+def _group1(match):
+    return match.group(1).strip()
+
+def _whole(match):
+    return match.group()
+
+def _whole_stripped(match):
+    return match.group().strip()
+
+SHIPPING_ADDRESS_NOISE = re.compile(r'(?:seller|vendor|johnson\s*plc|tax\s*id\s*[:\s]*[\d-]+|iban\s*[:\s]*.*?$|abn\s*[\d\s]+)', re.IGNORECASE)
+
+def _shipping_address(match):
+    return SHIPPING_ADDRESS_NOISE.sub('', _first_group(match)).strip()
+
+def _customer_name(match):
+    return match.group(1).strip().replace('Seller:', '').replace('Client:', '').replace('Johnson PLC', '').strip()
+
+def _amount(match):
+    value = match.group(1).replace(',', '.').replace('USD', '').replace('$', '').strip()
+    try:
+        return float(value) if value else 0.0
+    except ValueError as e:
+        logging.warning(f"Failed to convert total value '{value}': {str(e)}")
+        return 0.0
+
+def _summary_totals(match):
+    groups = [g for g in match.groups() if g is not None]
+    return tuple(float(g.replace(',', '.')) for g in groups[-3:])
+
+HEADER_AND_CUSTOMER = ("header", "customer")
+
+GENERAL_FIELDS = [
+    Field("invoice_date", ("header",), re.compile(r"(?:invoice\s*)?date\s*[:\s]*(?:\s*of\s*issue\s*[:\s]*)?(\w+\s+\d{1,2},\s+\d{4})|date\s*(?:of issue\s*)?[:\s]*(\d{2}/\d{2}/\d{4})|(\d{4}-\d{2}-\d{2})|(\d{2}-\d{2}-\d{4})|(\d{2}\s+\w+\s+\d{4})|(\d{2}\.\d{2}\.\d{4})|(\d{2}/\d{2}/\d{2})", re.IGNORECASE), _first_group),
+    Field("invoice_number", ("header",), re.compile(r"(?:invoice\s*(?:number|#|no\.?|no\s*:))\s*[:\s#]*([\w\d-]+)|no\s*:\s*([\d]{8})|([\d]{8})", re.IGNORECASE), _first_group),
+    Field("supplier_gst_number", HEADER_AND_CUSTOMER, re.compile(r"(?:supplier|vendor|seller)\s*(?:gst(?:in)?|tax\s*id|abn)\s*[:\-]?\s*([\d\s-]+)", re.IGNORECASE), _group1),
+    Field("bill_to_gst_number", HEADER_AND_CUSTOMER, re.compile(r"(?:bill\s*to|customer|client)\s*(?:gst(?:in)?|tax\s*id)\s*[:\-]?\s*([\d\s-]+)", re.IGNORECASE), _group1),
+    Field("po_number", HEADER_AND_CUSTOMER, re.compile(r"(?:po|purchase\s*order|order)\s*(?:no|number|#|id)\s*[:\-]?\s*([\w\d-]+)", re.IGNORECASE | re.DOTALL), _first_group),
+    Field("shipping_address", HEADER_AND_CUSTOMER, re.compile(r"(?:bill\s*to|ship\s*to|customer\s*name\s*[:\s]*|client\s*[:\s]*|attention\s*to\s*)(.*?)(?=(?:invoice\s*(?:number|date)|description\s*from\s*until|items|no\.|tax\s*id|iban|abn|$))", re.IGNORECASE | re.DOTALL), _shipping_address),
+]
+
+VENDOR_FIELDS = [
+    Field("company_name", ("vendor",), re.compile(r"(?:[A-Za-z\s]+\s*(?:Pty\. Ltd\.|Inc\.|LLC|PLC|WOODWORK))|(?:[A-Za-z\s]+Equipment)", re.IGNORECASE), _whole_stripped),
+    Field("phone", ("vendor",), re.compile(r"(?:\+\d{1,3}\s*)?(?:\d{1,4}[\s-])?\d{3}[\s-]\d{3}[\s-]\d{4}|\d{10}|\(\d{2,3}\)\s*\d{7,8}"), _whole),
+    Field("website", ("vendor",), re.compile(r"www\.[a-zA-Z0-9]+\.[a-zA-Z]{2,}|(?:[a-zA-Z0-9]+\.)*(?:com|org|net)"), _whole),
+]
+
+CUSTOMER_FIELDS = [
+    Field("customer_name", ("customer",), re.compile(r"(?:bill\s*to|ship\s*to|customer\s*name\s*[:\s]*|client\s*[:\s]*|attention\s*to\s*)([A-Za-z\s-]+?)(?=\s*(?:tax\s*id|address|\d{3,}|$))", re.IGNORECASE), _customer_name),
+]
+
+PAYMENT_FIELDS = [
+    Field("payment_terms", ("footer",), re.compile(r"payment\s*due\s*[:\s]*(.*?)(?=\s*(?:description|total|bank|$))", re.IGNORECASE), _group1),
+]
+
+BANK_FIELDS = [
+    Field("account_name", ("footer",), re.compile(r"(?:account\s*name|bank\s*account\s*name)[:\s]*(.*?)(?=\s*(?:bank\s*name|bsb|$))", re.IGNORECASE), _group1),
+    Field("bank_name", ("footer",), re.compile(r"(?:bank\s*name|name\s*of\s*bank|bank\s*details)[:\s]*(.*?)(?=\s*(?:bsb|account\s*number|bank\s*address|$))", re.IGNORECASE), _group1),
+    Field("account_number", ("footer",), re.compile(r"account\s*(?:number)[:\s]*([\d-]+)", re.IGNORECASE), _group1),
+    Field("swift_code", ("footer",), re.compile(r"swift\s*code[:\s]*([A-Z0-9]+)", re.IGNORECASE), _group1),
+    Field("iban", ("footer",), re.compile(r"iban\s*[:\s]*([A-Z0-9]+)", re.IGNORECASE), _group1),
+]
+
+TOTAL_FIELDS = [
+    Field("subtotal", ("footer",), re.compile(r"(?:sub ?total|total before tax|net amount)\s*[:\-]?\s*\$?([\d.,]+)", re.IGNORECASE), _amount),
+    Field("discount", ("footer",), re.compile(r"(?:discount|less|deduction|deduct)\s*[:\-]?\s*\$?([\d.,]+)", re.IGNORECASE), _amount),
+    Field("gst", ("footer",), re.compile(r"(?:gst|tax|vat|cgst|sgst|igst|sales\s*tax)\s*(?:\d+\%)?\s*[:\-]?\s*\$?([\d.,]+)", re.IGNORECASE), _amount),
+    Field("final_total", ("footer",), re.compile(r"(?:total|grand total|amount due|final amount|total due)\s*[:\-]?\s*([A-Za-z\s]*\$[\d.,]+|[\d.,]+)", re.IGNORECASE), _amount),
+    Field("summary_totals", ("footer",), re.compile(r"vat\s*\[\%\]\s*net\s*worth\s*vat\s*gross\s*worth\s*(\d+)%\s*([\d.,]+)\s*([\d.,]+)\s*([\d.,]+)|(\d+)%\s*([\d.,]+)\s*([\d.,]+)\s*([\d.,]+)", re.IGNORECASE), _summary_totals),
+]
+
+VENDOR_ADDRESS_SKIP = re.compile(r"(?:invoice|date|number|client|seller|no\s*:)", re.IGNORECASE)
+CUSTOMER_ADDRESS_SKIP = re.compile(r"(?:invoice\s*(?:date|date\s*of\s*issue|number)|total|description\s*from\s*until|items|no\.|tax\s*id|iban|worth|\d+\.\s+\w+|\d+\s+\w+|summary|\d+%\s*\d|payment\s*info|account|bank\s*details|terms)", re.IGNORECASE)
+CUSTOMER_ADDRESS_LABEL = re.compile(r"(?:seller|client|attention\s*to)")
+NUMBER_PATTERN = re.compile(r'\d{1,3}(,\d{3})*(\.\d+)?|\d+(\.\d+)?')
+VAT_PATTERN = re.compile(r'(\d+)%')
+
+def extract_fields(layout, fields, default=NOT_FOUND):
+    texts = {}
+    values = {}
+    for field in fields:
+        start = time.perf_counter()
+        text = texts.get(field.regions)
+        if text is None:
+            text = texts[field.regions] = ' '.join(layout.region_text(name) for name in field.regions)
+        match = field.pattern.search(text)
+        values[field.name] = field.post(match) if match else default
+        record_timing(field.name, time.perf_counter() - start)
+    return values
+
+def record_timing(name, seconds):
+    entry = _timings.get(name)
+    if entry is None:
+        entry = _timings[name] = [0, 0.0]
+    entry[0] += 1
+    entry[1] += seconds
+
+def field_timings():
+    return {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in _timings.items()}
+
+def log_field_timings(limit=5):
+    slowest = sorted(field_timings().items(), key=lambda item: item[1]["seconds"], reverse=True)[:limit]
+    if slowest:
+        logging.info("Slowest field patterns: " + ", ".join(
+            f"{name} {t['seconds'] * 1000:.1f}ms/{t['calls']} calls" for name, t in slowest))
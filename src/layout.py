@@ -0,0 +1,120 @@
+import numpy as np
+from elements import as_page_elements
+
+ROW_THRESHOLD = 20
+HEADER_ROWS = 5
+
+VENDOR_END_KEYWORDS = ["bill to", "ship to", "customer", "client", "seller", "attention to"]
+CUSTOMER_END_KEYWORDS = ["description", "items", "no.", "qty", "item", "organic", "amount", "1.", "01"]
+TABLE_END_KEYWORDS = ["summary", "total", "footer", "vat [%]", "subtotal", "gst", "sales tax", "total due"]
+TABLE_STOP_KEYWORDS = ['total', 'subtotal', 'gst', 'discount', "summary", 'vat [%]', 'sales tax', 'total due']
+TABLE_HEADER_KEYWORDS = ["description", "item", "quantity", "qty", "price", "rate", "amount", "total", "hsn/sac", "s.no", "sl.no", "no.", "product", "net price", "net worth", "gross", "subtotal", "um", "vat [%]"]
+
+class KeywordMatcher:
+    def __init__(self, groups):
+        self.groups = {name: frozenset(keywords) for name, keywords in groups.items()}
+        self.vocabulary = sorted({kw for kws in self.groups.values() for kw in kws})
+
+    def keywords(self, text):
+        return {kw for kw in self.vocabulary if kw in text}
+
+    def flags(self, texts):
+        page_text = "\n".join(texts)
+        present = [kw for kw in self.vocabulary if kw in page_text]
+        hits = [{kw for kw in present if kw in text} for text in texts]
+        return hits, {name: np.array([bool(h & kws) for h in hits], dtype=bool) for name, kws in self.groups.items()}
+
+ROW_MATCHER = KeywordMatcher({
+    "vendor_end": VENDOR_END_KEYWORDS,
+    "customer_end": CUSTOMER_END_KEYWORDS,
+    "table_end": TABLE_END_KEYWORDS,
+    "table_stop": TABLE_STOP_KEYWORDS,
+})
+HEADER_MATCHER = KeywordMatcher({"table_header": TABLE_HEADER_KEYWORDS})
+
+def cluster_rows(page, threshold=ROW_THRESHOLD):
+    if not len(page):
+        return []
+    ys = page.boxes['y']
+    xs = page.boxes['x']
+    order = np.argsort(ys, kind='stable')
+    row_ids = np.concatenate(([0], np.cumsum(np.diff(ys[order]) >= threshold)))
+    order = order[np.lexsort((xs[order], row_ids))]
+    bounds = [0] + (np.flatnonzero(np.diff(row_ids)) + 1).tolist() + [len(order)]
+    return [order[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+class Layout:
+    def __init__(self, page, row_indices):
+        self.page = page
+        self.rows = row_indices
+        texts = page.texts
+        self.row_text = [' '.join([texts[j] for j in idx.tolist()]) for idx in row_indices]
+        self.row_lower = [text.lower() for text in self.row_text]
+        self.row_compact = [text.replace(" ", "") for text in self.row_lower]
+        self.row_keywords, self.flags = ROW_MATCHER.flags(self.row_lower)
+        self.header_keywords, header_flags = HEADER_MATCHER.flags(self.row_compact)
+        self.flags.update(header_flags)
+        self._regions = None
+        self._region_bounds = {}
+        self._region_text = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _scan(self, start, flag):
+        hits = np.flatnonzero(self.flags[flag][start:])
+        if len(hits):
+            end = start + int(hits[0])
+            return list(range(start, end)), end
+        return list(range(start, len(self.rows))), max(start, len(self.rows) - 1)
+
+    def vendor_rows(self):
+        if self._regions is not None:
+            return self._regions["vendor"]
+        return self._scan(0, "vendor_end")[0] if self.rows else []
+
+    def _define_regions(self, bounds=None):
+        n = len(self.rows)
+        regions = {"header": list(range(min(HEADER_ROWS, n))), "vendor": [], "customer": [], "table": [], "footer": []}
+        if not n:
+            return regions, {}
+        if bounds is None:
+            regions["vendor"], customer_start = self._scan(0, "vendor_end")
+            regions["customer"], table_start = self._scan(customer_start, "customer_end")
+            bounds = {"vendor": [0, len(regions["vendor"])],
+                      "customer": [customer_start, customer_start + len(regions["customer"])], "table": table_start}
+        else:
+            regions["vendor"] = list(range(*bounds["vendor"]))
+            regions["customer"] = list(range(*bounds["customer"]))
+            table_start = bounds["table"]
+        regions["table"], footer_start = self._scan(table_start, "table_end")
+        regions["footer"] = list(range(footer_start, n))
+        return regions, bounds
+
+    @property
+    def regions(self):
+        if self._regions is None:
+            self.use_regions(None)
+        return self._regions
+
+    @property
+    def region_bounds(self):
+        if self._regions is None:
+            self.use_regions(None)
+        return self._region_bounds
+
+    def use_regions(self, bounds):
+        self._regions, self._region_bounds = self._define_regions(bounds)
+        self._region_text = {}
+
+    def has(self, row_index, flag):
+        return bool(self.flags[flag][row_index])
+
+    def region_text(self, name):
+        if name not in self._region_text:
+            self._region_text[name] = ' '.join(self.row_text[i] for i in self.regions[name])
+        return self._region_text[name]
+
+def build_layout(elements, threshold=ROW_THRESHOLD):
+    page = as_page_elements(elements)
+    return Layout(page, cluster_rows(page, threshold))
@@ -1,13 +1,20 @@
 import os
-import cv2
-import numpy as np
-from pdf2image import convert_from_path
-from PIL import Image
-from preprocess import preprocess_image
-from ocr import extract_text_with_positions
-from invoice_parser import parse_invoice_data
-from verification import perform_verifiability_checks
-from output import save_outputs
+import argparse
+import pipeline
+from pipeline import PIPELINE_VERSION, PAGE_WINDOW, process_document
+from preprocess import PREPROCESS_MODES
+from ocr import OCR_BACKENDS
+from render import RENDERERS, DPI_MODES
+from seal import SEAL_MODES
+from triage import TRIAGE_MODES
+from output import OUTPUT_FORMATS, OutputWriter, PerInvoiceSink, open_outputs
+from manifest import Manifest, config_fingerprint
+from batch import run_batch
+import service
+import ocr_cache
+import templates
+import profiling
+from fields import log_field_timings
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,65 +22,155 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 INPUT_DIR = os.path.join(BASE_DIR, "samples")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+OCR_CACHE_DIR = os.path.join(BASE_DIR, ".ocr_cache")
+TEMPLATE_DIR = os.path.join(BASE_DIR, ".layout_templates")
 
 os.makedirs(INPUT_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-Image.MAX_IMAGE_PIXELS = 200000000
-
-def process_pdf(pdf_path, output_dir):
+def process_pdf(pdf_path, output_dir, page_window=PAGE_WINDOW, writer=None):
     try:
         base_name = os.path.splitext(os.path.basename(pdf_path))[0]
         logging.info(f"Processing {base_name}.pdf")
-        images = convert_from_path(pdf_path, dpi=200)
-        
-        all_elements = []
-        last_image = None
-        for i, image in enumerate(images):
-            logging.info(f"Processing page {i+1}")
-            image_np = np.array(image)
-            
-            preprocessed = preprocess_image(image_np)
-            if preprocessed is None or preprocessed.size == 0:
-                logging.error("Preprocessing returned an empty image.")
-                raise ValueError("Preprocessing failed: Empty image")
-            
-            elements = extract_text_with_positions(preprocessed)
-            if not elements:
-                logging.warning(f"No text elements extracted from page {i+1}.")
-            all_elements.append(elements)
-            
-            last_image = image_np
-        
-        if not any(all_elements):
-            logging.error("No text elements extracted from any page.")
-            raise ValueError("OCR failed: No text extracted")
-        
-        invoice_data = parse_invoice_data(all_elements)
-        if not invoice_data["table_contents"]:
-            logging.warning("No table contents extracted.")
-        
-        verifiability_report = perform_verifiability_checks(invoice_data, all_elements)
-        
-        save_outputs(invoice_data, verifiability_report, last_image, output_dir, base_name)
-        
+        process_document(pdf_path, output_dir, page_window, writer)
         logging.info(f"Processed {base_name}.pdf successfully")
         return True
     except Exception as e:
         logging.error(f"Error processing {pdf_path}: {str(e)}", exc_info=True)
         return False
 
-def main():
-    pdf_files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(".pdf")]
-    
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract and verify invoice data from scanned PDFs.")
+    parser.add_argument("--input-dir", default=INPUT_DIR, help="Directory containing the PDFs to process")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory for JSON, Excel and seal outputs")
+    parser.add_argument("--outputs", default="per-invoice",
+                        help=f"Comma-separated output sinks ({', '.join(OUTPUT_FORMATS)}); batch sinks write one consolidated "
+                             "file per run instead of one per invoice")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for batch mode; pages of each PDF are spread across the pool (0 = all cores)")
+    parser.add_argument("--page-window", type=int, default=PAGE_WINDOW,
+                        help="Pages rasterized ahead of OCR in serial mode; bounds peak memory on long PDFs")
+    parser.add_argument("--preprocess", choices=PREPROCESS_MODES, default="full",
+                        help="'auto' skips denoising on clean scans and the perspective transform when the page fills the frame; "
+                             "'fast' always takes that path; the path taken per page is recorded in the verifiability report")
+    parser.add_argument("--ocr-backend", choices=OCR_BACKENDS, default="auto",
+                        help="'tesserocr' keeps one Tesseract engine loaded per worker; 'subprocess' runs the tesseract CLI per page; "
+                             "'auto' prefers tesserocr when installed")
+    parser.add_argument("--renderer", choices=RENDERERS, default="auto",
+                        help="'pymupdf' rasterizes in memory straight to NumPy; 'poppler' shells out to pdftoppm; "
+                             "'auto' prefers PyMuPDF when installed")
+    parser.add_argument("--dpi-mode", choices=DPI_MODES, default="fixed",
+                        help="'adaptive' renders a ~1000px probe, measures glyph height and renders each page at 72-300 DPI; "
+                             "the probe doubles as the deskew contour image and coordinates are scaled back to 200 DPI")
+    parser.add_argument("--no-text-layer", action="store_true",
+                        help="OCR every page; by default pages with an embedded text layer (PyMuPDF renderer) skip "
+                             "rasterization, preprocessing and OCR and use the PDF's own words")
+    parser.add_argument("--ocr-mode", choices=("page", "roi"), default="page",
+                        help="'roi' finds text blocks on a binarized copy and OCRs only those crops in parallel")
+    parser.add_argument("--roi-workers", type=int, default=4, help="Threads used to OCR region crops in roi mode")
+    parser.add_argument("--seal-mode", choices=SEAL_MODES, default="fast",
+                        help="'fast' searches a downsampled band from the parsed footer to the page bottom; 'full' scans the whole page")
+    parser.add_argument("--triage", choices=TRIAGE_MODES, default="off",
+                        help="Classify each rasterized page from a thumbnail: 'auto' skips blank pages after the first and OCRs "
+                             "dense-text boilerplate on the fast preprocessing path, 'skip' skips both, 'off' OCRs everything")
+    parser.add_argument("--abs-tolerance", type=float, default=0.01,
+                        help="Absolute tolerance for line-total, subtotal and final-total checks")
+    parser.add_argument("--rel-tolerance", type=float, default=0.0,
+                        help="Relative tolerance (fraction of the extracted value) for the same checks; the larger tolerance wins")
+    parser.add_argument("--ocr-cache-dir", default=OCR_CACHE_DIR, help="Directory for cached OCR results")
+    parser.add_argument("--ocr-cache-size-mb", type=int, default=ocr_cache.DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Evict least recently used OCR results beyond this size")
+    parser.add_argument("--no-ocr-cache", action="store_true", help="Bypass the OCR cache and always run Tesseract")
+    parser.add_argument("--purge-ocr-cache", action="store_true", help="Delete all cached OCR results before running")
+    parser.add_argument("--template-dir", default=TEMPLATE_DIR,
+                        help="Directory for cached vendor layout templates (region rows and table column boundaries)")
+    parser.add_argument("--layout-templates", action="store_true",
+                        help="Reuse cached vendor layout templates instead of rediscovering regions and table columns "
+                             "from keywords on every invoice; off by default so output does not depend on on-disk state")
+    parser.add_argument("--force", action="store_true",
+                        help="Reprocess every PDF even if the manifest shows its content and pipeline settings are unchanged")
+    parser.add_argument("--watch", action="store_true",
+                        help="Run as a service: queue PDFs as they appear in --input-dir and process them on a bounded pool")
+    parser.add_argument("--queue-db", help="SQLite job table for --watch (default: <output-dir>/jobs.sqlite3)")
+    parser.add_argument("--poll-interval", type=float, default=service.POLL_INTERVAL, help="Seconds between directory scans")
+    parser.add_argument("--max-attempts", type=int, default=service.MAX_ATTEMPTS,
+                        help="Attempts per job before a transient failure is marked failed")
+    parser.add_argument("--drain", action="store_true", help="With --watch, exit once the queue is empty")
+    parser.add_argument("--profile", metavar="TRACE_PATH",
+                        help="Time every stage per page and per document, write the trace here and log p50/p95 per stage")
+    parser.add_argument("--profile-format", choices=profiling.TRACE_FORMATS, default="chrome",
+                        help="'chrome' loads in chrome://tracing or Perfetto; 'jsonl' writes one event per line")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    pipeline.configure(preprocess_mode=args.preprocess, ocr_backend=args.ocr_backend, renderer=args.renderer,
+                       dpi_mode=args.dpi_mode, text_layer=not args.no_text_layer,
+                       ocr_mode=args.ocr_mode, roi_workers=max(1, args.roi_workers),
+                       abs_tolerance=args.abs_tolerance, rel_tolerance=args.rel_tolerance, seal_mode=args.seal_mode,
+                       triage=args.triage, layout_templates=args.layout_templates, template_dir=args.template_dir)
+
+    cache = ocr_cache.configure(args.ocr_cache_dir, args.ocr_cache_size_mb * 1024 * 1024)
+    if args.purge_ocr_cache:
+        cache.purge()
+        logging.info(f"Purged OCR cache at '{args.ocr_cache_dir}'")
+    if args.no_ocr_cache:
+        ocr_cache.configure(None)
+    if args.profile:
+        profiling.enable()
+    if args.watch:
+        service.run_service(args.input_dir, args.output_dir, args.queue_db or os.path.join(args.output_dir, "jobs.sqlite3"),
+                            workers=args.workers or os.cpu_count() or 1, poll_interval=args.poll_interval,
+                            max_attempts=args.max_attempts, drain=args.drain)
+        return
+    pdf_files = sorted(f for f in os.listdir(args.input_dir) if f.lower().endswith(".pdf"))
+
     if not pdf_files:
-        logging.error(f"No PDF files found in '{INPUT_DIR}'")
-        raise FileNotFoundError(f"No PDF files found in '{INPUT_DIR}'")
-    
-    for pdf_file in pdf_files:
-        pdf_path = os.path.join(INPUT_DIR, pdf_file)
-        process_pdf(pdf_path, OUTPUT_DIR)
-    
+        logging.error(f"No PDF files found in '{args.input_dir}'")
+        raise FileNotFoundError(f"No PDF files found in '{args.input_dir}'")
+
+    pdf_paths = [os.path.join(args.input_dir, pdf_file) for pdf_file in pdf_files]
+    formats = [f.strip() for f in args.outputs.split(",") if f.strip()]
+    manifest = Manifest.load(args.output_dir) if "per-invoice" in formats else None
+    fingerprint = config_fingerprint(PIPELINE_VERSION, pipeline.settings())
+    unchanged = []
+    if manifest is not None and not args.force:
+        pdf_paths, unchanged = manifest.partition(pdf_paths, fingerprint)
+        if unchanged:
+            logging.info(f"Skipping {len(unchanged)} unchanged PDFs, {len(pdf_paths)} to process (--force to reprocess all)")
+
+    with open_outputs(args.output_dir, formats) as writer:
+        batch_sinks = OutputWriter(sink for sink in writer.sinks if not isinstance(sink, PerInvoiceSink))
+        for pdf_path in unchanged if batch_sinks.sinks else []:
+            manifest.replay(pdf_path, batch_sinks)
+        if args.workers == 1:
+            results = [(pdf_path, process_pdf(pdf_path, args.output_dir, page_window=max(1, args.page_window), writer=writer))
+                       for pdf_path in pdf_paths]
+        else:
+            results = run_batch(pdf_paths, args.output_dir, workers=args.workers or None, writer=writer)
+
+    if manifest is not None:
+        for pdf_path, ok in results:
+            if ok:
+                manifest.record(pdf_path, fingerprint)
+        manifest.save()
+
+    cache_stats = ocr_cache.stats()
+    if cache_stats and args.workers == 1:
+        logging.info(f"OCR cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                     f"{cache_stats['evictions']} evictions")
+    template_stats = templates.stats()
+    if template_stats:
+        logging.info(f"Layout templates: {template_stats['hits']} hits, {template_stats['misses']} misses, "
+                     f"{template_stats['rejected']} rejected")
+
+    log_field_timings()
+    if args.profile:
+        profiler = profiling.profiler()
+        profiler.log_summary()
+        profiler.write_trace(args.profile, args.profile_format)
+        logging.info(f"Wrote {args.profile_format} trace to '{args.profile}'")
     logging.info("Processing complete. Check output directory for results.")
 
 if __name__ == "__main__":
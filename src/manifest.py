@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+MANIFEST_NAME = "manifest.json"
+HASH_CHUNK = 1024 * 1024
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def config_fingerprint(version, settings):
+    payload = json.dumps({"version": version, "settings": settings}, sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+def per_invoice_artifacts(base_name):
+    return [f"extracted_data_{base_name}.json", f"verifiability_report_{base_name}.json",
+            f"extracted_data_{base_name}.xlsx", f"seal_signature_{base_name}.png"]
+
+class Manifest:
+    def __init__(self, output_dir, entries=None):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = entries or {}
+        self._hashes = {}
+
+    @classmethod
+    def load(cls, output_dir):
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                return cls(output_dir, json.load(f).get("documents", {}))
+        except FileNotFoundError:
+            return cls(output_dir)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable manifest '{path}': {str(e)}")
+            return cls(output_dir)
+
+    def content_hash(self, pdf_path):
+        stat = os.stat(pdf_path)
+        entry = self.entries.get(os.path.basename(pdf_path))
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["hash"], stat
+        cached = self._hashes.get(pdf_path)
+        if cached is None or cached[1] != (stat.st_size, stat.st_mtime_ns):
+            cached = (file_hash(pdf_path), (stat.st_size, stat.st_mtime_ns))
+            self._hashes[pdf_path] = cached
+        return cached[0], stat
+
+    def is_current(self, pdf_path, fingerprint):
+        entry = self.entries.get(os.path.basename(pdf_path))
+        if not entry or entry.get("config") != fingerprint:
+            return False
+        if self.content_hash(pdf_path)[0] != entry.get("hash"):
+            return False
+        return all(os.path.exists(os.path.join(self.output_dir, name)) for name in entry.get("artifacts", []))
+
+    def partition(self, pdf_paths, fingerprint):
+        pending, current = [], []
+        for pdf_path in pdf_paths:
+            (current if self.is_current(pdf_path, fingerprint) else pending).append(pdf_path)
+        return pending, current
+
+    def record(self, pdf_path, fingerprint):
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        digest, stat = self.content_hash(pdf_path)
+        artifacts = [name for name in per_invoice_artifacts(base_name)
+                     if os.path.exists(os.path.join(self.output_dir, name))]
+        self.entries[os.path.basename(pdf_path)] = {
+            "hash": digest,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "config": fingerprint,
+            "artifacts": artifacts,
+            "processed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"documents": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def replay(self, pdf_path, writer):
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        with open(os.path.join(self.output_dir, f"extracted_data_{base_name}.json")) as f:
+            invoice_data = json.load(f)
+        with open(os.path.join(self.output_dir, f"verifiability_report_{base_name}.json")) as f:
+            verifiability_report = json.load(f)
+        writer.write(base_name, invoice_data, verifiability_report)
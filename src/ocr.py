@@ -1,81 +1,125 @@
 import pytesseract
 from PIL import Image
 import numpy as np
-from pytesseract import Output
-import cv2
-import os
+import io
+import subprocess
+import logging
+import threading
+from elements import PageElements
 
-def extract_text_with_positions(image):
-    try:
-        if isinstance(image, np.ndarray):
-            pil_image = Image.fromarray(image)
-        else:
-            pil_image = image
-        data = pytesseract.image_to_data(pil_image, output_type=Output.DICT, config='--psm 6')
-        elements = []
-        for i in range(len(data['text'])):
-            if int(data['conf'][i]) > 50:
-                text = data['text'][i].strip()
-                x = data['left'][i]
-                y = data['top'][i]
-                if text and x is not None and y is not None and isinstance(x, (int, float)) and isinstance(y, (int, float)):
-                    element = {'text': text, 'x': int(x), 'y': int(y), 'width': data['width'][i], 'height': data['height'][i], 'confidence': float(data['conf'][i]) / 100.0}
-                    elements.append(element)
-        return elements
-    except Exception as e:
-        print(f"OCR Error: {str(e)}")
-        return []
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+TESSERACT_LANG = 'eng'
+TESSERACT_PSM = 6
+TESSERACT_CONFIG = f'--psm {TESSERACT_PSM}'
+MIN_CONFIDENCE = 50
+OCR_BACKENDS = ("subprocess", "tesserocr", "auto")
+
+TSV_INT_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num', 'left', 'top', 'width', 'height')
+
+def parse_tsv(tsv):
+    lines = tsv.splitlines()
+    if not lines:
+        return {name: [] for name in TSV_INT_COLUMNS + ('conf', 'text')}
+    header = lines[0].split('\t')
+    data = {name: [] for name in header}
+    for line in lines[1:]:
+        values = line.split('\t')
+        values += [''] * (len(header) - len(values))
+        for name, value in zip(header, values):
+            if name in TSV_INT_COLUMNS:
+                value = int(value)
+            elif name == 'conf':
+                value = float(value)
+            data[name].append(value)
+    return data
+
+class SubprocessBackend:
+    name = "subprocess"
+
+    def image_to_data(self, pil_image, psm=TESSERACT_PSM):
+        buffer = io.BytesIO()
+        pil_image.save(buffer, format="PPM" if pil_image.mode in ("RGB", "L", "1") else "PNG")
+        command = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", TESSERACT_LANG, "--psm", str(psm), "tsv"]
+        result = subprocess.run(command, input=buffer.getvalue(), capture_output=True)
+        if result.returncode != 0:
+            raise pytesseract.TesseractError(result.returncode, result.stderr.decode(errors="replace").strip())
+        return parse_tsv(result.stdout.decode("utf-8", errors="replace"))
+
+class TesserocrBackend:
+    name = "tesserocr"
 
-def detect_seal_signature(image, output_dir, pdf_name, ocr_elements=None):
+    def __init__(self):
+        self.api = tesserocr.PyTessBaseAPI(lang=TESSERACT_LANG, psm=TESSERACT_PSM)
+
+    def image_to_data(self, pil_image, psm=TESSERACT_PSM):
+        data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+        self.api.SetPageSegMode(psm)
+        self.api.SetImage(pil_image)
+        self.api.Recognize()
+        level = tesserocr.RIL.WORD
+        for word in tesserocr.iterate_level(self.api.GetIterator(), level):
+            box = word.BoundingBox(level)
+            if box is None:
+                continue
+            x1, y1, x2, y2 = box
+            data['text'].append(word.GetUTF8Text(level) or '')
+            data['conf'].append(word.Confidence(level))
+            data['left'].append(x1)
+            data['top'].append(y1)
+            data['width'].append(x2 - x1)
+            data['height'].append(y2 - y1)
+        return data
+
+    def close(self):
+        self.api.End()
+
+_backend_name = None
+_local = threading.local()
+
+def set_backend(name):
+    global _backend_name
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend '{name}'")
+    if name == "auto":
+        name = "tesserocr" if tesserocr is not None else "subprocess"
+    elif name == "tesserocr" and tesserocr is None:
+        logging.warning("tesserocr is not installed; falling back to the tesseract subprocess backend.")
+        name = "subprocess"
+    _backend_name = name
+
+def backend_name():
+    if _backend_name is None:
+        set_backend("auto")
+    return _backend_name
+
+def get_backend():
+    name = backend_name()
+    backend = getattr(_local, "backend", None)
+    if backend is None or backend.name != name:
+        if backend is not None and hasattr(backend, "close"):
+            backend.close()
+        try:
+            backend = TesserocrBackend() if name == "tesserocr" else SubprocessBackend()
+        except Exception as e:
+            logging.warning(f"Could not start tesserocr engine ({str(e)}); falling back to the tesseract subprocess backend.")
+            set_backend("subprocess")
+            backend = SubprocessBackend()
+        _local.backend = backend
+    return backend
+
+def to_pil(image):
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return image
+
+def extract_text_with_positions(image, psm=TESSERACT_PSM):
     try:
-        if isinstance(image, Image.Image):
-            image = np.array(image)
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
-        if ocr_elements:
-            mask = np.ones_like(thresh) * 255
-            for elem in ocr_elements:
-                x, y, w, h = elem['x'], elem['y'], elem['width'], elem['height']
-                cv2.rectangle(mask, (x, y), (x + w, y + h), 0, -1)
-            kernel = np.ones((10, 10), np.uint8)
-            mask = cv2.dilate(mask, kernel, iterations=2)
-            thresh = cv2.bitwise_and(thresh, mask)
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        red_lower1 = np.array([0, 70, 50])
-        red_upper1 = np.array([10, 255, 255])
-        red_lower2 = np.array([170, 70, 50])
-        red_upper2 = np.array([180, 255, 255])
-        blue_lower = np.array([100, 50, 50])
-        blue_upper = np.array([140, 255, 255])
-        red_mask1 = cv2.inRange(hsv, red_lower1, red_upper1)
-        red_mask2 = cv2.inRange(hsv, red_lower2, red_upper2)
-        blue_mask = cv2.inRange(hsv, blue_lower, blue_upper)
-        color_mask = cv2.bitwise_or(red_mask1, red_mask2)
-        color_mask = cv2.bitwise_or(color_mask, blue_mask)
-        combined_thresh = cv2.bitwise_or(thresh, color_mask)
-        kernel = np.ones((5, 5), np.uint8)
-        combined_thresh = cv2.morphologyEx(combined_thresh, cv2.MORPH_CLOSE, kernel)
-        height, width = gray.shape
-        contours, _ = cv2.findContours(combined_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        max_area = height * width * 0.15
-        min_area = 300
-        largest_element = None
-        largest_area = 0
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            area = w * h
-            if min_area < area < max_area and area > largest_area:
-                largest_area = area
-                largest_element = {'x': x, 'y': y, 'width': w, 'height': h}
-        if largest_element:
-            x, y, w, h = largest_element['x'], largest_element['y'], largest_element['width'], largest_element['height']
-            element_image = image[y:y + h, x:x + w]
-            output_path = os.path.join(output_dir, f"{pdf_name}_seal_signature.png")
-            cv2.imwrite(output_path, element_image)
-            return True, output_path
-        return False, None
+        data = get_backend().image_to_data(to_pil(image), psm)
+        return PageElements.from_tesseract(data, MIN_CONFIDENCE)
     except Exception as e:
-        print(f"Seal/Signature Detection Error: {str(e)}")
-        return False, None
\ No newline at end of file
+        print(f"OCR Error: {str(e)}")
+        return PageElements()
@@ -0,0 +1,135 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import numpy as np
+from PIL import Image
+import ocr
+import roi
+from elements import PageElements
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_VERSION = 2
+
+class OCRCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._size = None
+
+    def key(self, image, mode="page"):
+        if isinstance(image, Image.Image):
+            image = np.array(image)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"v{CACHE_VERSION}|{mode}|{ocr.backend_name()}|{ocr.TESSERACT_CONFIG}|{ocr.MIN_CONFIDENCE}|{image.dtype}|{image.shape}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                elements = PageElements.from_columns(json.load(f))
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return elements
+
+    def put(self, key, elements):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(elements.to_columns(), f)
+        os.replace(tmp_path, path)
+        self.stats["writes"] += 1
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.stats["evictions"] += 1
+        self._size = size
+
+    def purge(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._size = 0
+
+_cache = None
+
+def configure(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    global _cache
+    _cache = OCRCache(cache_dir, max_bytes) if cache_dir else None
+    return _cache
+
+def settings():
+    if _cache is None:
+        return (None, DEFAULT_MAX_BYTES)
+    return (_cache.cache_dir, _cache.max_bytes)
+
+def stats():
+    return dict(_cache.stats) if _cache is not None else {}
+
+def run_ocr(image, mode="page", roi_workers=4):
+    if mode == "roi":
+        return roi.extract_text_from_regions(image, workers=roi_workers)
+    return ocr.extract_text_with_positions(image)
+
+def extract_text_cached(image, mode="page", roi_workers=4):
+    if _cache is None:
+        return run_ocr(image, mode, roi_workers)
+    try:
+        key = _cache.key(image, mode)
+        elements = _cache.get(key)
+    except Exception as e:
+        logging.warning(f"OCR cache lookup failed: {str(e)}")
+        return run_ocr(image, mode, roi_workers)
+    if elements is not None:
+        return elements
+    elements = run_ocr(image, mode, roi_workers)
+    if elements:
+        try:
+            _cache.put(key, elements)
+        except Exception as e:
+            logging.warning(f"OCR cache write failed: {str(e)}")
+    return elements
@@ -1,42 +1,128 @@
 import os
 import json
+import importlib.util
 import pandas as pd
 import cv2
-import numpy as np
-
-def detect_seal_signature(image):
-    try:
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 1000:
-                x, y, w, h = cv2.boundingRect(contour)
-                return image[y:y+h, x:x+w], True
-        return None, False
-    except Exception as e:
-        print(f"Seal detection error: {str(e)}")
-        return None, False
-
-def save_outputs(invoice_data, verifiability_report, image, output_dir, base_name):
-    os.makedirs(output_dir, exist_ok=True)
-    
-    with open(os.path.join(output_dir, f"extracted_data_{base_name}.json"), 'w') as f:
-        json.dump(invoice_data, f, indent=4)
-    
-    with open(os.path.join(output_dir, f"verifiability_report_{base_name}.json"), 'w') as f:
-        json.dump(verifiability_report, f, indent=4)
-    
-    general_df = pd.DataFrame([invoice_data["general_information"]])
-    table_df = pd.DataFrame(invoice_data["table_contents"])
-    with pd.ExcelWriter(os.path.join(output_dir, f"extracted_data_{base_name}.xlsx")) as writer:
-        general_df.to_excel(writer, sheet_name="General Information", index=False)
-        table_df.to_excel(writer, sheet_name="Table Contents", index=False)
-    
-    seal_img, detected = detect_seal_signature(image)
-    if detected:
-        cv2.imwrite(os.path.join(output_dir, f"seal_signature_{base_name}.png"), seal_img)
-        invoice_data["general_information"]["seal_and_sign_present"] = True
-    else:
-        invoice_data["general_information"]["seal_and_sign_present"] = False
+from batch_verification import BatchVerificationSink
+
+OUTPUT_FORMATS = ("per-invoice", "jsonl", "parquet", "excel-batch", "batch-verification")
+BATCH_BASE_NAME = "batch_results"
+
+def _general_row(base_name, invoice_data):
+    return {"file": base_name, **invoice_data["general_information"]}
+
+def _table_rows(base_name, invoice_data):
+    return [{"file": base_name, "row": i + 1, **item} for i, item in enumerate(invoice_data["table_contents"])]
+
+def _verification_row(base_name, verifiability_report):
+    summary = verifiability_report["summary"]
+    return {
+        "file": base_name,
+        "all_fields_present": summary.get("all_fields_present"),
+        "all_line_items_valid": summary.get("all_line_items_valid"),
+        "issues": "; ".join(summary.get("issues", [])),
+    }
+
+class PerInvoiceSink:
+    def __init__(self, output_dir, excel=True):
+        self.output_dir = output_dir
+        self.excel = excel
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, base_name, invoice_data, verifiability_report, seal_image=None):
+        with open(os.path.join(self.output_dir, f"extracted_data_{base_name}.json"), 'w') as f:
+            json.dump(invoice_data, f, indent=4)
+
+        with open(os.path.join(self.output_dir, f"verifiability_report_{base_name}.json"), 'w') as f:
+            json.dump(verifiability_report, f, indent=4)
+
+        if self.excel:
+            general_df = pd.DataFrame([invoice_data["general_information"]])
+            table_df = pd.DataFrame(invoice_data["table_contents"])
+            with pd.ExcelWriter(os.path.join(self.output_dir, f"extracted_data_{base_name}.xlsx")) as writer:
+                general_df.to_excel(writer, sheet_name="General Information", index=False)
+                table_df.to_excel(writer, sheet_name="Table Contents", index=False)
+
+        if seal_image is not None:
+            if seal_image.ndim == 3:
+                seal_image = cv2.cvtColor(seal_image, cv2.COLOR_RGB2BGR)
+            cv2.imwrite(os.path.join(self.output_dir, f"seal_signature_{base_name}.png"), seal_image)
+
+    def close(self):
+        pass
+
+class JsonlSink:
+    def __init__(self, output_dir, name=BATCH_BASE_NAME):
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, f"{name}.jsonl")
+        self.file = open(self.path, 'w')
+
+    def write(self, base_name, invoice_data, verifiability_report, seal_image=None):
+        record = {"file": base_name, "invoice": invoice_data, "verification": verifiability_report}
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class _BufferedTableSink:
+    def __init__(self):
+        self.general_rows = []
+        self.table_rows = []
+        self.verification_rows = []
+
+    def write(self, base_name, invoice_data, verifiability_report, seal_image=None):
+        self.general_rows.append(_general_row(base_name, invoice_data))
+        self.table_rows.extend(_table_rows(base_name, invoice_data))
+        self.verification_rows.append(_verification_row(base_name, verifiability_report))
+
+class ParquetSink(_BufferedTableSink):
+    def __init__(self, output_dir, name=BATCH_BASE_NAME):
+        if importlib.util.find_spec("pyarrow") is None and importlib.util.find_spec("fastparquet") is None:
+            raise ImportError("Parquet output requires pyarrow or fastparquet")
+        super().__init__()
+        os.makedirs(output_dir, exist_ok=True)
+        self.prefix = os.path.join(output_dir, name)
+
+    def close(self):
+        pd.DataFrame(self.general_rows).to_parquet(f"{self.prefix}_general.parquet", index=False)
+        pd.DataFrame(self.table_rows).to_parquet(f"{self.prefix}_table.parquet", index=False)
+        pd.DataFrame(self.verification_rows).to_parquet(f"{self.prefix}_verification.parquet", index=False)
+
+class ExcelBatchSink(_BufferedTableSink):
+    def __init__(self, output_dir, name=BATCH_BASE_NAME):
+        super().__init__()
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, f"{name}.xlsx")
+
+    def close(self):
+        with pd.ExcelWriter(self.path) as writer:
+            pd.DataFrame(self.general_rows).to_excel(writer, sheet_name="General Information", index=False)
+            pd.DataFrame(self.table_rows).to_excel(writer, sheet_name="Table Contents", index=False)
+            pd.DataFrame(self.verification_rows).to_excel(writer, sheet_name="Verification", index=False)
+
+class OutputWriter:
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def write(self, base_name, invoice_data, verifiability_report, seal_image=None):
+        for sink in self.sinks:
+            sink.write(base_name, invoice_data, verifiability_report, seal_image)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_outputs(output_dir, formats=("per-invoice",)):
+    sink_types = {"per-invoice": PerInvoiceSink, "jsonl": JsonlSink, "parquet": ParquetSink, "excel-batch": ExcelBatchSink,
+                  "batch-verification": BatchVerificationSink}
+    unknown = [f for f in formats if f not in sink_types]
+    if unknown:
+        raise ValueError(f"Unknown output formats: {unknown}")
+    return OutputWriter(sink_types[f](output_dir) for f in formats)
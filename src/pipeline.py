@@ -0,0 +1,210 @@
+import os
+import logging
+import queue
+import threading
+import ocr
+import profiling
+import render
+import templates
+from PIL import Image
+from preprocess import preprocess_with_info
+from ocr_cache import extract_text_cached
+from invoice_parser import parse_invoice_data
+from verification import perform_verifiability_checks
+from confidence import ConfidenceIndex
+from output import OutputWriter, PerInvoiceSink
+from seal import detect_seal_signature
+from triage import triage_page
+from elements import PageElements
+
+PIPELINE_VERSION = 1
+DPI = 200
+PAGE_WINDOW = 2
+
+Image.MAX_IMAGE_PIXELS = 200000000
+
+SETTINGS = {
+    "preprocess_mode": "full",
+    "ocr_backend": "auto",
+    "renderer": "auto",
+    "dpi_mode": "fixed",
+    "text_layer": True,
+    "seal_mode": "fast",
+    "triage": "off",
+    "layout_templates": False,
+    "template_dir": None,
+    "ocr_mode": "page",
+    "roi_workers": 4,
+    "abs_tolerance": 0.01,
+    "rel_tolerance": 0.0,
+}
+
+def configure(**settings):
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown pipeline settings: {sorted(unknown)}")
+    SETTINGS.update(settings)
+    ocr.set_backend(SETTINGS["ocr_backend"])
+    render.set_renderer(SETTINGS["renderer"])
+    templates.configure(SETTINGS["template_dir"], SETTINGS["layout_templates"])
+
+def settings():
+    return dict(SETTINGS)
+
+def count_pages(pdf):
+    return render.count_pages(pdf)
+
+def render_page(pdf, page_number, dpi=DPI, need_image=True):
+    return render.render_page(pdf, page_number, dpi, SETTINGS["dpi_mode"], SETTINGS["text_layer"], need_image)
+
+def iter_pages(pdf, dpi=DPI, window=PAGE_WINDOW):
+    return render.iter_rendered(pdf, dpi, window, SETTINGS["dpi_mode"], SETTINGS["text_layer"])
+
+def prefetch(iterable, depth=PAGE_WINDOW):
+    done = object()
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    worker = threading.Thread(target=produce, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+def process_page(image_np, page_number, render_info=None):
+    logging.info(f"Processing page {page_number}")
+    render_info = render_info or {}
+    if "elements" in render_info:
+        profiling.count("pages")
+        profiling.count("text_layer_pages")
+        return render_info["elements"], {"page": page_number, "source": "text_layer"}
+
+    preprocess_mode = SETTINGS["preprocess_mode"]
+    triage = None
+    if SETTINGS["triage"] != "off":
+        with profiling.stage("triage", page_number):
+            triage = triage_page(render_info.get("layout", image_np), page_number, SETTINGS["triage"])
+        if triage["action"] == "skipped":
+            logging.info(f"Skipping {triage['class']} page {page_number}")
+            profiling.count("skipped_pages")
+            return PageElements(), {"page": page_number, "source": "skipped", "triage": triage}
+        if triage["action"] == "fast":
+            preprocess_mode = "fast"
+
+    with profiling.stage("preprocess", page_number):
+        preprocessed, preprocess_info = preprocess_with_info(image_np, preprocess_mode, render_info.get("layout"))
+    if preprocessed is None or preprocessed.size == 0:
+        logging.error("Preprocessing returned an empty image.")
+        raise ValueError("Preprocessing failed: Empty image")
+
+    with profiling.stage("ocr", page_number):
+        elements = extract_text_cached(preprocessed, SETTINGS["ocr_mode"], SETTINGS["roi_workers"])
+    dpi = render_info.get("dpi", DPI)
+    if dpi != DPI:
+        elements = elements.scaled(DPI / dpi)
+    profiling.count("pages")
+    profiling.count("ocr_elements", len(elements))
+    if not elements:
+        logging.warning(f"No text elements extracted from page {page_number}.")
+    page_info = {"page": page_number, "source": "ocr", "preprocessing": preprocess_info}
+    if triage is not None:
+        page_info["triage"] = triage
+    if "glyph_height" in render_info:
+        page_info["render"] = {key: render_info[key] for key in ("dpi", "probe_dpi", "glyph_height", "ink_ratio")}
+    return elements, page_info
+
+def seal_source(all_elements, last_image, page_infos=None, pdf=None):
+    seal_page = len(all_elements) - 1
+    if page_infos:
+        seal_page = max((i for i, info in enumerate(page_infos) if info.get("source") != "skipped"), default=seal_page)
+    seal_info = page_infos[seal_page] if page_infos else {}
+    image, dpi = last_image, seal_info.get("render", {}).get("dpi", DPI)
+    if seal_page != len(all_elements) - 1 or image is None:
+        image = None
+        if pdf is not None:
+            image, render_info = render.render_page(pdf, seal_info.get("page", seal_page + 1), DPI, SETTINGS["dpi_mode"])
+            dpi = render_info.get("dpi", DPI)
+    elements = all_elements[seal_page]
+    if seal_info.get("preprocessing", {}).get("deskew") == "transformed":
+        elements = None
+    return image, elements, dpi
+
+def page_seal(all_elements, last_image, page_infos=None, pdf=None):
+    with profiling.stage("seal"):
+        image, elements, dpi = seal_source(all_elements, last_image, page_infos, pdf)
+        if image is None:
+            return None, False
+        seal_image, seal_detected = detect_seal_signature(image, elements, SETTINGS["seal_mode"], dpi / DPI)
+    return (seal_image if seal_detected else None), seal_detected
+
+def finalize_document(all_elements, last_image, output_dir, base_name, page_infos=None, writer=None, pdf=None, seal=None):
+    if not any(all_elements):
+        logging.error("No text elements extracted from any page.")
+        raise ValueError("OCR failed: No text extracted")
+
+    with profiling.stage("parse"):
+        invoice_data = parse_invoice_data(all_elements)
+    if not invoice_data["table_contents"]:
+        logging.warning("No table contents extracted.")
+
+    with profiling.stage("verify"):
+        verifiability_report = perform_verifiability_checks(invoice_data, ConfidenceIndex.from_pages(all_elements),
+                                                            SETTINGS["abs_tolerance"], SETTINGS["rel_tolerance"])
+    if page_infos is not None:
+        verifiability_report["pages"] = page_infos
+
+    seal_image, seal_detected = seal if seal is not None else page_seal(all_elements, last_image, page_infos, pdf)
+    invoice_data["general_information"]["seal_and_sign_present"] = seal_detected
+
+    if writer is None:
+        writer = PerInvoiceSink(output_dir)
+    with profiling.stage("output"):
+        writer.write(base_name, invoice_data, verifiability_report, seal_image)
+    return invoice_data, verifiability_report
+
+def process_pages(pages, output_dir, base_name, writer=None, pdf=None):
+    with profiling.document(base_name):
+        all_elements = []
+        page_infos = []
+        last_image = None
+        for page_number, image_np, render_info in pages:
+            elements, page_info = process_page(image_np, page_number, render_info)
+            all_elements.append(elements)
+            page_infos.append(page_info)
+            last_image = image_np
+
+        return finalize_document(all_elements, last_image, output_dir, base_name, page_infos, writer, pdf)
+
+def process_document(pdf_path, output_dir, page_window=PAGE_WINDOW, writer=None):
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    return process_pages(prefetch(iter_pages(pdf_path, window=page_window), depth=page_window), output_dir, base_name,
+                         writer, pdf_path)
+
+def extract_from_bytes(pdf_bytes, base_name="upload", page_window=PAGE_WINDOW):
+    pages = prefetch(iter_pages(pdf_bytes, window=page_window), depth=page_window)
+    return process_pages(pages, None, base_name, OutputWriter([]), pdf_bytes)
@@ -3,45 +3,91 @@ import numpy as np
 import imutils
 from imutils.perspective import four_point_transform
 
-def preprocess_image(image):
+PREPROCESS_MODES = ("full", "fast", "auto")
+LAYOUT_WIDTH = 1000
+NOISE_SIGMA_THRESHOLD = 3.0
+BORDER_FRACTION = 0.03
+BORDER_DARK_LEVEL = 128
+BORDER_DARK_RATIO = 0.1
+
+NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+def estimate_noise(gray):
+    h, w = gray.shape
+    if h < 3 or w < 3:
+        return 0.0
+    response = cv2.filter2D(gray.astype(np.float32), -1, NOISE_KERNEL)[1:-1, 1:-1]
+    return float(np.abs(response).sum() * np.sqrt(0.5 * np.pi) / (6.0 * (w - 2) * (h - 2)))
+
+def quadrilateral_plausible(gray):
+    h, w = gray.shape
+    band = max(1, int(min(h, w) * BORDER_FRACTION))
+    border = np.concatenate([gray[:band].ravel(), gray[-band:].ravel(), gray[:, :band].ravel(), gray[:, -band:].ravel()])
+    return float(np.mean(border < BORDER_DARK_LEVEL)) >= BORDER_DARK_RATIO
+
+def find_receipt_contour(thresh):
+    cnts = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    cnts = imutils.grab_contours(cnts)
+    cnts = sorted(cnts, key=cv2.contourArea, reverse=True)[:5]
+
+    for c in cnts:
+        peri = cv2.arcLength(c, True)
+        approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+        if len(approx) == 4:
+            return approx
+    return None
+
+def preprocess_with_info(image, mode="full", layout=None):
+    info = {"path": "full", "noise_sigma": None, "denoised": False, "deskew": "skipped"}
     try:
         if isinstance(image, np.ndarray):
             img = image
         else:
             img = np.array(image)
 
-        resized = imutils.resize(img, width=1000)
+        if layout is not None and layout.shape[1] == LAYOUT_WIDTH:
+            resized = layout
+        else:
+            resized = imutils.resize(img, width=LAYOUT_WIDTH)
         ratio = img.shape[1] / float(resized.shape[1])
-        
+
         gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-        
-        denoised = cv2.fastNlMeansDenoising(gray, h=10, templateWindowSize=7, searchWindowSize=21)
-        
+
+        if mode != "full":
+            noise = estimate_noise(gray)
+            info["noise_sigma"] = round(noise, 2)
+            if mode == "fast" or noise < NOISE_SIGMA_THRESHOLD:
+                info["path"] = "fast"
+
+        if info["path"] == "fast":
+            if not quadrilateral_plausible(gray):
+                return img, info
+            denoised = gray
+        else:
+            denoised = cv2.fastNlMeansDenoising(gray, h=10, templateWindowSize=7, searchWindowSize=21)
+            info["denoised"] = True
+
         thresh = cv2.adaptiveThreshold(
-            denoised, 255, 
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            denoised, 255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
             cv2.THRESH_BINARY, 31, 10
         )
-        
-        cnts = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        cnts = imutils.grab_contours(cnts)
-        cnts = sorted(cnts, key=cv2.contourArea, reverse=True)[:5]
-        
-        receiptCnt = None
-        for c in cnts:
-            peri = cv2.arcLength(c, True)
-            approx = cv2.approxPolyDP(c, 0.02 * peri, True)
-            if len(approx) == 4:
-                receiptCnt = approx
-                break
-        
+
+        receiptCnt = find_receipt_contour(thresh)
+
         if receiptCnt is not None:
             transformed = four_point_transform(img, receiptCnt.reshape(4, 2) * ratio)
+            info["deskew"] = "transformed"
         else:
             transformed = img
+            info["deskew"] = "no_contour"
 
-        return transformed
+        return transformed, info
 
     except Exception as e:
         print(f"Preprocessing error: {str(e)}")
-        return image
+        info["error"] = str(e)
+        return image, info
+
+def preprocess_image(image, mode="full"):
+    return preprocess_with_info(image, mode)[0]
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+import numpy as np
+
+TRACE_FORMATS = ("chrome", "jsonl")
+
+_NULL_SPAN = nullcontext()
+_profiler = None
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'doc', 'page', 'wall', 'start')
+
+    def __init__(self, profiler, name, doc, page):
+        self.profiler = profiler
+        self.name = name
+        self.doc = doc
+        self.page = page
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.wall, time.perf_counter() - self.start, self.doc, self.page)
+
+class Profiler:
+    def __init__(self):
+        self.events = []
+        self.counters = defaultdict(int)
+        self.document = None
+        self.lock = threading.Lock()
+
+    def stage(self, name, page=None, doc=None):
+        return _Span(self, name, doc or self.document, page)
+
+    def record(self, name, wall, duration, doc=None, page=None):
+        event = {"name": name, "doc": doc, "page": page, "start": wall, "duration": duration,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        with self.lock:
+            self.events.append(event)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def drain(self):
+        with self.lock:
+            events, counters = self.events, dict(self.counters)
+            self.events = []
+            self.counters = defaultdict(int)
+        return events, counters
+
+    def merge(self, events, counters):
+        with self.lock:
+            self.events.extend(events)
+            for name, n in counters.items():
+                self.counters[name] += n
+
+    def summary(self):
+        durations = defaultdict(list)
+        for event in self.events:
+            durations[event["name"]].append(event["duration"])
+        rows = []
+        for name, values in durations.items():
+            values = np.asarray(values) * 1000.0
+            rows.append({"stage": name, "count": len(values), "total_ms": float(values.sum()),
+                         "p50_ms": float(np.percentile(values, 50)), "p95_ms": float(np.percentile(values, 95))})
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def log_summary(self):
+        rows = self.summary()
+        if not rows:
+            return
+        logging.info(f"{'stage':<12} {'count':>6} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9}")
+        for row in rows:
+            logging.info(f"{row['stage']:<12} {row['count']:>6} {row['total_ms']:>10.1f} "
+                         f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+        for name, n in sorted(self.counters.items()):
+            logging.info(f"{name}: {n}")
+
+    def write_trace(self, path, fmt="chrome"):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{fmt}'")
+        with open(path, 'w') as f:
+            if fmt == "jsonl":
+                for event in self.events:
+                    f.write(json.dumps(event) + "\n")
+                return
+            trace = [{"name": e["name"], "cat": "pipeline", "ph": "X", "ts": e["start"] * 1e6, "dur": e["duration"] * 1e6,
+                      "pid": e["pid"], "tid": e["tid"], "args": {"doc": e["doc"], "page": e["page"]}}
+                     for e in self.events]
+            json.dump({"traceEvents": trace, "otherData": {"counters": dict(self.counters)}}, f)
+
+def enable():
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
+
+def disable():
+    global _profiler
+    _profiler = None
+
+def enabled():
+    return _profiler is not None
+
+def profiler():
+    return _profiler
+
+def stage(name, page=None):
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.stage(name, page)
+
+def set_document(name):
+    if _profiler is not None:
+        _profiler.document = name
+
+def document(name):
+    if _profiler is None:
+        return _NULL_SPAN
+    _profiler.document = name
+    return _profiler.stage("document", doc=name)
+
+def count(name, n=1):
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+def drain():
+    return _profiler.drain() if _profiler is not None else ([], {})
+
+def merge(events, counters):
+    if _profiler is not None:
+        _profiler.merge(events, counters)
@@ -0,0 +1,189 @@
+import logging
+import cv2
+import imutils
+import numpy as np
+import profiling
+from elements import PageElements
+from preprocess import LAYOUT_WIDTH
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
+from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
+
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+RENDERERS = ("poppler", "pymupdf", "auto")
+PDF_ERRORS = (PDFPageCountError, PDFSyntaxError) + ((pymupdf.FileDataError,) if pymupdf is not None else ())
+DPI_MODES = ("fixed", "adaptive")
+PROBE_DPI = 100
+MIN_DPI = 72
+MAX_DPI = 300
+DPI_STEP = 25
+TARGET_GLYPH_PX = 14
+GLYPH_PERCENTILE = 25
+MIN_GLYPH_PX = 3
+MIN_GLYPHS = 20
+MAX_GLYPH_FRACTION = 0.05
+MIN_TEXT_WORDS = 20
+MIN_TEXT_ALNUM = 0.6
+
+_renderer_name = None
+
+def set_renderer(name):
+    global _renderer_name
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{name}'")
+    if name == "auto":
+        name = "pymupdf" if pymupdf is not None else "poppler"
+    elif name == "pymupdf" and pymupdf is None:
+        logging.warning("PyMuPDF is not installed; falling back to the poppler renderer.")
+        name = "poppler"
+    _renderer_name = name
+
+def renderer_name():
+    if _renderer_name is None:
+        set_renderer("auto")
+    return _renderer_name
+
+def pdf_source(pdf):
+    if hasattr(pdf, "read"):
+        pdf = pdf.read()
+    if isinstance(pdf, (bytearray, memoryview)):
+        pdf = bytes(pdf)
+    return pdf
+
+def open_document(pdf):
+    pdf = pdf_source(pdf)
+    if isinstance(pdf, bytes):
+        return pymupdf.open(stream=pdf, filetype="pdf")
+    return pymupdf.open(pdf)
+
+def pixmap_array(page, dpi):
+    zoom = dpi / 72.0
+    pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csRGB, alpha=False)
+    return np.frombuffer(bytearray(pix.samples_mv), dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+
+def _poppler_convert(pdf, **kwargs):
+    if isinstance(pdf, bytes):
+        return convert_from_bytes(pdf, **kwargs)
+    return convert_from_path(pdf, **kwargs)
+
+def count_pages(pdf):
+    pdf = pdf_source(pdf)
+    if renderer_name() == "pymupdf":
+        with open_document(pdf) as doc:
+            return doc.page_count
+    if isinstance(pdf, bytes):
+        return int(pdfinfo_from_bytes(pdf)["Pages"])
+    return int(pdfinfo_from_path(pdf)["Pages"])
+
+def _poppler_page(pdf, page_number, dpi):
+    images = _poppler_convert(pdf, dpi=dpi, first_page=page_number, last_page=page_number)
+    if not images:
+        raise ValueError(f"Rasterization failed: page {page_number} not rendered")
+    return np.array(images[0])
+
+def glyph_metrics(probe):
+    gray = cv2.cvtColor(probe, cv2.COLOR_RGB2GRAY) if probe.ndim == 3 else probe
+    if gray.std() < 1.0:
+        return None, 0.0
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ink_ratio = float(np.count_nonzero(ink)) / ink.size
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    glyphs = (heights >= MIN_GLYPH_PX) & (heights <= gray.shape[0] * MAX_GLYPH_FRACTION) & (widths <= heights * 4)
+    if np.count_nonzero(glyphs) < MIN_GLYPHS:
+        return None, ink_ratio
+    return float(np.percentile(heights[glyphs], GLYPH_PERCENTILE)), ink_ratio
+
+def choose_dpi(glyph_height, probe_dpi, default_dpi):
+    if glyph_height is None:
+        return default_dpi
+    dpi = round(probe_dpi * TARGET_GLYPH_PX / glyph_height / DPI_STEP) * DPI_STEP
+    return int(min(MAX_DPI, max(MIN_DPI, dpi)))
+
+def _render_adaptive(render_at, probe_dpi, default_dpi):
+    probe = render_at(probe_dpi)
+    glyph_height, ink_ratio = glyph_metrics(probe)
+    dpi = choose_dpi(glyph_height, probe_dpi, default_dpi)
+    if probe.shape[1] != LAYOUT_WIDTH:
+        probe = imutils.resize(probe, width=LAYOUT_WIDTH)
+    info = {"dpi": dpi, "probe_dpi": round(probe_dpi, 1), "glyph_height": glyph_height,
+            "ink_ratio": round(ink_ratio, 4), "layout": probe}
+    return render_at(dpi), info
+
+def text_layer_elements(page, dpi):
+    if page.rotation:
+        return None
+    words = [w for w in page.get_text("words") if w[4].strip()]
+    if len(words) < MIN_TEXT_WORDS:
+        return None
+    if sum(any(c.isalnum() for c in w[4]) for w in words) < MIN_TEXT_ALNUM * len(words):
+        return None
+    zoom = dpi / 72.0
+    x0, y0 = page.rect.x0, page.rect.y0
+    return PageElements.from_columns({
+        'text': [w[4].strip() for w in words],
+        'x': [int(round((w[0] - x0) * zoom)) for w in words],
+        'y': [int(round((w[1] - y0) * zoom)) for w in words],
+        'width': [int(round((w[2] - w[0]) * zoom)) for w in words],
+        'height': [int(round((w[3] - w[1]) * zoom)) for w in words],
+        'confidence': [1.0] * len(words),
+    })
+
+def _render_mupdf(page, dpi, mode):
+    if mode == "adaptive":
+        return _render_adaptive(lambda d: pixmap_array(page, d), 72.0 * LAYOUT_WIDTH / page.rect.width, dpi)
+    return pixmap_array(page, dpi), {"dpi": dpi}
+
+def _mupdf_page(page, page_number, dpi, mode, text_layer, need_image):
+    elements = None
+    if text_layer:
+        with profiling.stage("text_layer", page_number):
+            elements = text_layer_elements(page, dpi)
+        if elements is not None:
+            if not need_image:
+                return None, {"dpi": dpi, "elements": elements}
+            mode = "fixed"
+    with profiling.stage("rasterize", page_number):
+        image_np, info = _render_mupdf(page, dpi, mode)
+    if elements is not None:
+        info["elements"] = elements
+    return image_np, info
+
+def render_page(pdf, page_number, dpi, mode="fixed", text_layer=False, need_image=True):
+    pdf = pdf_source(pdf)
+    if renderer_name() == "pymupdf":
+        with open_document(pdf) as doc:
+            return _mupdf_page(doc[page_number - 1], page_number, dpi, mode, text_layer, need_image)
+    with profiling.stage("rasterize", page_number):
+        if mode == "adaptive":
+            return _render_adaptive(lambda d: _poppler_page(pdf, page_number, d), PROBE_DPI, dpi)
+        return _poppler_page(pdf, page_number, dpi), {"dpi": dpi}
+
+def iter_rendered(pdf, dpi, window, mode="fixed", text_layer=False):
+    pdf = pdf_source(pdf)
+    if renderer_name() == "pymupdf":
+        with open_document(pdf) as doc:
+            for index in range(doc.page_count):
+                need_image = index == doc.page_count - 1
+                yield (index + 1,) + _mupdf_page(doc[index], index + 1, dpi, mode, text_layer, need_image)
+        return
+
+    page_count = count_pages(pdf)
+    if mode == "adaptive":
+        for page_number in range(1, page_count + 1):
+            yield (page_number,) + render_page(pdf, page_number, dpi, mode)
+        return
+
+    for first_page in range(1, page_count + 1, window):
+        last_page = min(first_page + window - 1, page_count)
+        with profiling.stage("rasterize", first_page):
+            images = _poppler_convert(pdf, dpi=dpi, first_page=first_page, last_page=last_page)
+        page_number = first_page
+        while images:
+            image_np = np.array(images.pop(0))
+            yield page_number, image_np, {"dpi": dpi}
+            page_number += 1
@@ -0,0 +1,117 @@
+import os
+import threading
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import ocr
+from elements import PageElements
+
+LAYOUT_WIDTH = 1000
+BLOCK_GAP_X = 60
+BLOCK_GAP_LINES = 1.5
+RULE_LENGTH = 40
+MIN_BLOCK_AREA = 60
+MIN_BLOCK_INK = 30
+MAX_BLOCK_FRACTION = 0.9
+CROP_PADDING = 0.004
+WIDE_BLOCK_FRACTION = 0.5
+PSM_SINGLE_LINE = 7
+PSM_COLUMN = 4
+PSM_BLOCK = 6
+
+def _to_gray(image):
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return image
+
+def _merge_overlapping(rects):
+    rects = list(rects)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        while rects:
+            x, y, w, h = rects.pop()
+            i = 0
+            while i < len(rects):
+                ox, oy, ow, oh = rects[i]
+                if ox < x + w and x < ox + ow and oy < y + h and y < oy + oh:
+                    nx, ny = min(x, ox), min(y, oy)
+                    w, h = max(x + w, ox + ow) - nx, max(y + h, oy + oh) - ny
+                    x, y = nx, ny
+                    rects.pop(i)
+                    merged = True
+                else:
+                    i += 1
+            result.append((x, y, w, h))
+        rects = result
+    return rects
+
+def detect_text_blocks(image):
+    gray = _to_gray(np.asarray(image))
+    height, width = gray.shape
+    scale = LAYOUT_WIDTH / float(width) if width > LAYOUT_WIDTH else 1.0
+    small = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    binary = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 31, 10)
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    glyph_heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    glyph_heights = glyph_heights[(glyph_heights > 2) & (glyph_heights < small.shape[0] * 0.05)]
+    line_height = float(np.median(glyph_heights)) * 1.5 if len(glyph_heights) else 15.0
+
+    rules = cv2.bitwise_or(
+        cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (RULE_LENGTH, 1))),
+        cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, RULE_LENGTH))))
+    text_mask = cv2.bitwise_and(binary, cv2.bitwise_not(rules))
+    block_kernel = (BLOCK_GAP_X, max(3, int(line_height * BLOCK_GAP_LINES)))
+    merged = cv2.dilate(text_mask, cv2.getStructuringElement(cv2.MORPH_RECT, block_kernel))
+    contours, _ = cv2.findContours(merged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    small_area = small.shape[0] * small.shape[1]
+    pad = int(CROP_PADDING * width)
+    blocks = []
+    for x, y, w, h in _merge_overlapping(cv2.boundingRect(contour) for contour in contours):
+        if w * h > small_area * MAX_BLOCK_FRACTION:
+            return []
+        if w * h < MIN_BLOCK_AREA or cv2.countNonZero(text_mask[y:y + h, x:x + w]) < MIN_BLOCK_INK:
+            continue
+        if h < 2 * line_height:
+            psm = PSM_SINGLE_LINE
+        elif w > small.shape[1] * WIDE_BLOCK_FRACTION:
+            psm = PSM_COLUMN
+        else:
+            psm = PSM_BLOCK
+        x0 = max(0, int(x / scale) - pad)
+        y0 = max(0, int(y / scale) - pad)
+        x1 = min(width, int((x + w) / scale) + pad)
+        y1 = min(height, int((y + h) / scale) + pad)
+        blocks.append((x0, y0, x1 - x0, y1 - y0, psm))
+    blocks.sort(key=lambda b: (b[1], b[0]))
+    return blocks
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+def _region_pool(workers):
+    global _pool, _pool_key
+    key = (os.getpid(), max(1, workers))
+    with _pool_lock:
+        if _pool_key != key:
+            if _pool is not None and _pool_key[0] == key[0]:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(max_workers=key[1], thread_name_prefix="roi-ocr")
+            _pool_key = key
+        return _pool
+
+def extract_text_from_regions(image, workers=4):
+    image = np.asarray(image)
+    blocks = detect_text_blocks(image)
+    if not blocks:
+        return ocr.extract_text_with_positions(image)
+
+    def run(block):
+        x, y, w, h, psm = block
+        return ocr.extract_text_with_positions(image[y:y + h, x:x + w], psm).shifted(x, y)
+
+    return PageElements.concat(_region_pool(workers).map(run, blocks))
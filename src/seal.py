@@ -0,0 +1,94 @@
+import logging
+import cv2
+import numpy as np
+from elements import as_page_elements
+from layout import build_layout
+
+SEAL_MODES = ("fast", "full")
+FAST_WIDTH = 800
+BAND_TOP = 0.6
+FOOTER_MARGIN = 0.05
+MIN_SEAL_AREA = 300
+MAX_SEAL_FRACTION = 0.15
+RED_RANGES = (((0, 70, 50), (10, 255, 255)), ((170, 70, 50), (180, 255, 255)))
+BLUE_RANGE = ((100, 50, 50), (140, 255, 255))
+
+def footer_top(elements):
+    page = as_page_elements(elements)
+    if not len(page):
+        return None
+    layout = build_layout(page)
+    footer = layout.regions["footer"]
+    if not footer or len(footer) == len(layout.rows):
+        return None
+    return int(page.boxes['y'][layout.rows[footer[0]]].min())
+
+def _odd(value):
+    return max(3, int(round(value)) | 1)
+
+def locate_seal(image, elements=None, mode="fast", scale=1.0):
+    height, width = image.shape[:2]
+    page = as_page_elements(elements) if elements is not None else None
+    top, factor = 0, 1.0
+    if mode == "fast":
+        top = int(height * BAND_TOP)
+        footer_y = footer_top(page) if page is not None else None
+        if footer_y is not None:
+            top = max(0, min(top, int(footer_y * scale - FOOTER_MARGIN * height)))
+        factor = min(1.0, FAST_WIDTH / width)
+
+    roi = image[top:]
+    if factor < 1.0:
+        roi = cv2.resize(roi, (max(1, int(width * factor)), max(1, int(roi.shape[0] * factor))), interpolation=cv2.INTER_AREA)
+    k = scale * factor
+
+    gray = cv2.cvtColor(roi, cv2.COLOR_RGB2GRAY) if roi.ndim == 3 else roi
+    thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, _odd(11 * k), 2)
+
+    if page is not None and len(page):
+        boxes = page.boxes
+        xs, ys = boxes['x'] * k, boxes['y'] * k - top * factor
+        ws, hs = boxes['width'] * k, boxes['height'] * k
+        visible = np.flatnonzero(ys + hs >= 0)
+        mask = np.full_like(thresh, 255)
+        for i in visible.tolist():
+            cv2.rectangle(mask, (int(xs[i]), int(ys[i])), (int(xs[i] + ws[i]), int(ys[i] + hs[i])), 0, -1)
+        grow = max(1, int(round(10 * k)))
+        mask = cv2.erode(mask, np.ones((grow, grow), np.uint8), iterations=2)
+        thresh = cv2.bitwise_and(thresh, mask)
+
+    if roi.ndim == 3:
+        hsv = cv2.cvtColor(roi, cv2.COLOR_RGB2HSV)
+        for lower, upper in RED_RANGES + (BLUE_RANGE,):
+            thresh = cv2.bitwise_or(thresh, cv2.inRange(hsv, np.array(lower), np.array(upper)))
+
+    close = max(1, int(round(5 * k)))
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, np.ones((close, close), np.uint8))
+
+    min_area = MIN_SEAL_AREA * k * k
+    max_area = height * width * factor * factor * MAX_SEAL_FRACTION
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    best, best_area = None, 0
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area = w * h
+        if min_area < area < max_area and area > best_area:
+            best, best_area = (x, y, w, h), area
+    if best is None:
+        return None
+
+    x, y, w, h = best
+    x0, y0 = int(x / factor), int(y / factor) + top
+    x1, y1 = min(width, int(np.ceil((x + w) / factor))), min(height, int(np.ceil((y + h) / factor)) + top)
+    return x0, y0, x1 - x0, y1 - y0
+
+def detect_seal_signature(image, elements=None, mode="fast", scale=1.0):
+    try:
+        box = locate_seal(image, elements, mode, scale)
+        if box is None:
+            return None, False
+        x, y, w, h = box
+        return image[y:y + h, x:x + w], True
+    except Exception as e:
+        logging.warning(f"Seal detection error: {str(e)}")
+        return None, False
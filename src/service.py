@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import ocr_cache
+import pipeline
+import profiling
+from batch import _init_worker
+
+POLL_INTERVAL = 2.0
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 5.0
+METRICS_INTERVAL = 30.0
+METRICS_NAME = "service_metrics.json"
+TRANSIENT_ERRORS = (OSError, TimeoutError, MemoryError, BrokenProcessPool)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    UNIQUE (path, size, mtime_ns)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, not_before, id);
+"""
+
+class JobQueue:
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, path, size=None, mtime_ns=None):
+        if size is None or mtime_ns is None:
+            stat = os.stat(path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        cursor = self.conn.execute("INSERT OR IGNORE INTO jobs (path, size, mtime_ns, enqueued_at) VALUES (?, ?, ?, ?)",
+                                   (path, size, mtime_ns, time.time()))
+        return cursor.rowcount == 1
+
+    def claim(self):
+        row = self.conn.execute("SELECT id, path, enqueued_at, attempts FROM jobs WHERE status = 'queued' AND not_before <= ? "
+                                "ORDER BY id LIMIT 1", (time.time(),)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                          (time.time(), row[0]))
+        return {"id": row[0], "path": row[1], "enqueued_at": row[2], "attempts": row[3] + 1}
+
+    def complete(self, job_id):
+        self.conn.execute("UPDATE jobs SET status = 'done', finished_at = ?, error = NULL WHERE id = ?", (time.time(), job_id))
+
+    def fail(self, job_id, error, retry_at=None):
+        if retry_at is None:
+            self.conn.execute("UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                              (time.time(), error, job_id))
+        else:
+            self.conn.execute("UPDATE jobs SET status = 'queued', not_before = ?, error = ? WHERE id = ?",
+                              (retry_at, error, job_id))
+
+    def requeue_running(self):
+        return self.conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+
+    def counts(self):
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update(dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")))
+        return counts
+
+    def close(self):
+        self.conn.close()
+
+class DirectoryWatcher:
+    def __init__(self, input_dir):
+        self.input_dir = input_dir
+        self.pending = {}
+        self.unsettled = 0
+
+    def poll(self):
+        stable = []
+        seen = {}
+        try:
+            names = os.listdir(self.input_dir)
+        except FileNotFoundError:
+            return stable
+        for name in names:
+            if not name.lower().endswith(".pdf"):
+                continue
+            path = os.path.join(self.input_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self.pending.get(path) == signature:
+                stable.append((path,) + signature)
+            seen[path] = signature
+        self.pending = seen
+        self.unsettled = len(seen) - len(stable)
+        return stable
+
+def _run_job(pdf_path, output_dir):
+    start = time.perf_counter()
+    pipeline.process_document(pdf_path, output_dir)
+    return time.perf_counter() - start
+
+class ServiceMetrics:
+    def __init__(self, window=1000):
+        self.latencies = deque(maxlen=window)
+        self.processing = deque(maxlen=window)
+        self.retries = 0
+
+    def observe(self, latency, processing):
+        self.latencies.append(latency)
+        self.processing.append(processing)
+
+    def snapshot(self, counts, in_flight):
+        snapshot = {"queue_depth": counts["queued"], "in_flight": in_flight, "done": counts["done"],
+                    "failed": counts["failed"], "retries": self.retries}
+        for name, values in (("latency", self.latencies), ("processing", self.processing)):
+            if values:
+                values = np.asarray(values)
+                snapshot[f"{name}_p50_s"] = float(np.percentile(values, 50))
+                snapshot[f"{name}_p95_s"] = float(np.percentile(values, 95))
+        return snapshot
+
+def _write_metrics(path, snapshot):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp_path, path)
+
+def run_service(input_dir, output_dir, db_path, workers=1, poll_interval=POLL_INTERVAL, max_attempts=MAX_ATTEMPTS,
+                drain=False):
+    os.makedirs(input_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+    queue = JobQueue(db_path)
+    recovered = queue.requeue_running()
+    if recovered:
+        logging.info(f"Requeued {recovered} jobs left running by a previous service")
+    watcher = DirectoryWatcher(input_dir)
+    metrics = ServiceMetrics()
+    metrics_path = os.path.join(output_dir, METRICS_NAME)
+    limit = workers * 2
+    in_flight = {}
+    last_metrics = time.monotonic()
+    logging.info(f"Watching '{input_dir}' with {workers} workers (queue: {db_path})")
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(ocr_cache.settings(), pipeline.settings(), profiling.enabled()))
+    try:
+        while True:
+            for path, size, mtime_ns in watcher.poll():
+                if queue.enqueue(path, size, mtime_ns):
+                    logging.info(f"Queued {os.path.basename(path)}")
+
+            while len(in_flight) < limit:
+                job = queue.claim()
+                if job is None:
+                    break
+                in_flight[pool.submit(_run_job, job["path"], output_dir)] = job
+
+            if in_flight:
+                done, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            else:
+                done = ()
+                if drain and queue.counts()["queued"] == 0 and not watcher.unsettled:
+                    break
+                time.sleep(poll_interval)
+
+            for future in done:
+                job = in_flight.pop(future)
+                name = os.path.basename(job["path"])
+                try:
+                    processing = future.result()
+                    queue.complete(job["id"])
+                    metrics.observe(time.time() - job["enqueued_at"], processing)
+                    logging.info(f"Processed {name} in {processing:.1f}s")
+                except Exception as e:
+                    transient = isinstance(e, TRANSIENT_ERRORS) and job["attempts"] < max_attempts
+                    retry_at = time.time() + RETRY_BACKOFF * 2 ** (job["attempts"] - 1) if transient else None
+                    queue.fail(job["id"], str(e), retry_at)
+                    if transient:
+                        metrics.retries += 1
+                        logging.warning(f"Retrying {name} (attempt {job['attempts']} of {max_attempts}): {str(e)}")
+                    else:
+                        logging.error(f"Error processing {name}: {str(e)}")
+                    if isinstance(e, BrokenProcessPool):
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        for other in in_flight.values():
+                            queue.fail(other["id"], "worker pool restarted", time.time())
+                        in_flight.clear()
+                        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                   initargs=(ocr_cache.settings(), pipeline.settings(), profiling.enabled()))
+                        break
+
+            if time.monotonic() - last_metrics >= METRICS_INTERVAL:
+                last_metrics = time.monotonic()
+                snapshot = metrics.snapshot(queue.counts(), len(in_flight))
+                _write_metrics(metrics_path, snapshot)
+                logging.info(f"Queue depth {snapshot['queue_depth']}, in flight {snapshot['in_flight']}, "
+                             f"done {snapshot['done']}, failed {snapshot['failed']}, "
+                             f"latency p95 {snapshot.get('latency_p95_s', 0.0):.1f}s")
+    except KeyboardInterrupt:
+        logging.info(f"Stopping; waiting for {len(in_flight)} in-flight jobs")
+        for future, job in in_flight.items():
+            try:
+                future.result()
+                queue.complete(job["id"])
+            except Exception as e:
+                queue.fail(job["id"], str(e), time.time())
+    finally:
+        pool.shutdown(wait=True)
+        _write_metrics(metrics_path, metrics.snapshot(queue.counts(), 0))
+        queue.close()
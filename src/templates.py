@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import hashlib
+import logging
+from collections import namedtuple
+
+TEMPLATE_VERSION = 2
+FINGERPRINT_ROWS = 8
+MIN_HEADER_TOKENS = 4
+MIN_TEMPLATE_KEYWORDS = 2
+GSTIN_PATTERN = re.compile(r"\b(\d{2}[A-Z]{5}\d{4}[A-Z][A-Z\d]Z[A-Z\d])\b")
+TOKEN_PATTERN = re.compile(r"[a-z]{2,}")
+MONTHS = ("january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+          "november", "december")
+MONTH_TOKENS = frozenset(MONTHS) | frozenset(month[:3] for month in MONTHS) | {"sept"}
+
+LayoutTemplate = namedtuple("LayoutTemplate", ["regions", "anchors", "header_row", "header_keywords", "fields", "boundaries"])
+
+def vendor_fingerprint(layout):
+    rows = layout.vendor_rows()
+    if not rows or len(rows) == len(layout):
+        return None
+    vendor_text = ' '.join(layout.row_text[i] for i in rows[:FINGERPRINT_ROWS])
+    gstin = GSTIN_PATTERN.search(vendor_text.upper())
+    if gstin:
+        key = f"gst:{gstin.group(1)}"
+    else:
+        tokens = sorted(set(TOKEN_PATTERN.findall(vendor_text.lower())) - MONTH_TOKENS)
+        if len(tokens) < MIN_HEADER_TOKENS:
+            return None
+        key = "tokens:" + ' '.join(tokens)
+    return hashlib.blake2b(f"v{TEMPLATE_VERSION}|{key}".encode(), digest_size=12).hexdigest()
+
+def learn_template(layout, header_row, fields, boundaries):
+    bounds = layout.region_bounds
+    anchors = [[row, flag] for row, flag in ((bounds["customer"][0], "vendor_end"), (bounds["table"], "customer_end"))
+               if row < len(layout) and layout.has(row, flag)]
+    header_keywords = sorted(layout.header_keywords[header_row])
+    if not anchors or len(header_keywords) < MIN_TEMPLATE_KEYWORDS:
+        return None
+    return LayoutTemplate(bounds, anchors, header_row, header_keywords, list(fields), [float(b) for b in boundaries])
+
+def template_matches(template, layout):
+    n = len(layout)
+    if template.header_row >= n or template.header_row < template.regions["table"]:
+        return False
+    if max(template.regions["vendor"][1], template.regions["customer"][1]) > n:
+        return False
+    if sorted(layout.header_keywords[template.header_row]) != template.header_keywords:
+        return False
+    return all(layout.has(row, flag) for row, flag in template.anchors)
+
+class TemplateStore:
+    def __init__(self, store_dir=None):
+        self.store_dir = store_dir
+        self.templates = {}
+        self.stats = {"hits": 0, "misses": 0, "rejected": 0, "writes": 0}
+
+    def _path(self, fingerprint):
+        return os.path.join(self.store_dir, f"{fingerprint}.json")
+
+    def get(self, fingerprint):
+        if fingerprint not in self.templates and self.store_dir:
+            try:
+                with open(self._path(fingerprint)) as f:
+                    self.templates[fingerprint] = LayoutTemplate(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                self.templates[fingerprint] = None
+        return self.templates.get(fingerprint)
+
+    def put(self, fingerprint, template):
+        self.templates[fingerprint] = template
+        if not self.store_dir:
+            return
+        os.makedirs(self.store_dir, exist_ok=True)
+        path = self._path(fingerprint)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(template._asdict(), f)
+        os.replace(tmp_path, path)
+        self.stats["writes"] += 1
+
+    def lookup(self, layout):
+        fingerprint = vendor_fingerprint(layout)
+        if fingerprint is None:
+            return None, None
+        template = self.get(fingerprint)
+        if template is None:
+            self.stats["misses"] += 1
+            return fingerprint, None
+        if not template_matches(template, layout):
+            self.stats["rejected"] += 1
+            return fingerprint, None
+        self.stats["hits"] += 1
+        return fingerprint, template
+
+    def learn(self, fingerprint, layout, header_row, fields, boundaries):
+        template = learn_template(layout, header_row, fields, boundaries)
+        if template is None:
+            return
+        try:
+            self.put(fingerprint, template)
+        except OSError as e:
+            logging.warning(f"Layout template write failed: {str(e)}")
+
+_store = None
+
+def configure(store_dir=None, enabled=True):
+    global _store
+    _store = TemplateStore(store_dir) if enabled else None
+    return _store
+
+def store():
+    return _store
+
+def stats():
+    return dict(_store.stats) if _store is not None else {}
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+TRIAGE_MODES = ("off", "auto", "skip")
+THUMB_WIDTH = 600
+MIN_CONTRAST = 16
+MIN_COMPONENT_AREA = 4
+BLANK_INK_RATIO = 0.0002
+BLANK_COMPONENTS = 3
+DENSE_COMPONENTS = 1000
+DENSE_LINE_FILL = 0.8
+WORD_GAP = 9
+RULE_WIDTH = 0.3
+RULE_HEIGHT = 4
+LARGE_COMPONENT = 0.01
+
+def thumbnail(image, width=THUMB_WIDTH):
+    step = max(1, image.shape[1] // (width * 2))
+    image = image[::step, ::step]
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    height = max(1, int(round(gray.shape[0] * width / gray.shape[1])))
+    return cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+
+def ink_mask(gray):
+    _, dark = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    dark = dark > 0
+    count = np.count_nonzero(dark)
+    if count == 0 or count == dark.size or gray[~dark].mean() - gray[dark].mean() < MIN_CONTRAST:
+        return np.zeros_like(gray)
+    ink = dark if count <= dark.size / 2 else ~dark
+    return ink.astype(np.uint8) * 255
+
+def page_metrics(image):
+    gray = thumbnail(image)
+    ink = ink_mask(gray)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    stats = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= MIN_COMPONENT_AREA]
+    widths, heights = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+    rules = (widths >= RULE_WIDTH * gray.shape[1]) & (heights <= RULE_HEIGHT)
+    large = widths * heights > LARGE_COMPONENT * gray.size
+
+    line_fill = 0.0
+    columns = np.flatnonzero(ink.any(axis=0))
+    if len(columns):
+        lines = np.count_nonzero(cv2.dilate(ink, np.ones((1, WORD_GAP), np.uint8)), axis=1)
+        line_fill = float(np.median(lines[lines > 0])) / (columns[-1] - columns[0] + 1)
+    return {
+        "ink_ratio": round(float(np.count_nonzero(ink)) / ink.size, 5),
+        "components": int(len(stats)),
+        "rules": int(np.count_nonzero(rules)),
+        "large_components": int(np.count_nonzero(large)),
+        "line_fill": round(line_fill, 3),
+    }
+
+def classify_page(metrics, page_number=1):
+    if metrics["ink_ratio"] < BLANK_INK_RATIO or metrics["components"] < BLANK_COMPONENTS:
+        return "blank"
+    if (page_number > 1 and metrics["components"] >= DENSE_COMPONENTS and metrics["line_fill"] >= DENSE_LINE_FILL
+            and not metrics["rules"] and not metrics["large_components"]):
+        return "boilerplate"
+    return "invoice"
+
+def triage_action(page_class, mode, page_number=1):
+    if mode == "off" or page_class == "invoice" or page_number == 1:
+        return "ocr"
+    if page_class == "blank" or mode == "skip":
+        return "skipped"
+    return "fast"
+
+def triage_page(image, page_number=1, mode="auto"):
+    metrics = page_metrics(image)
+    page_class = classify_page(metrics, page_number)
+    return dict(metrics, **{"class": page_class, "action": triage_action(page_class, mode, page_number)})
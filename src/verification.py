@@ -1,8 +1,30 @@
 import re
 import numpy as np
 from typing import Dict
+from confidence import ConfidenceIndex, as_confidence_index
 
-def perform_verifiability_checks(invoice_data: Dict, confidences: Dict) -> Dict:
+ABS_TOLERANCE = 0.01
+REL_TOLERANCE = 0.0
+
+def _within(calculated, extracted, abs_tolerance, rel_tolerance):
+    return np.abs(np.subtract(calculated, extracted)) <= np.maximum(abs_tolerance, rel_tolerance * np.abs(extracted))
+
+def _float_column(items, key, errors):
+    raw = [item.get(key, 0.0) for item in items]
+    try:
+        return np.array(raw, dtype=float).reshape(len(raw))
+    except (TypeError, ValueError):
+        column = np.zeros(len(raw))
+        for i, value in enumerate(raw):
+            try:
+                column[i] = float(value)
+            except (TypeError, ValueError) as e:
+                errors.setdefault(i, str(e))
+        return column
+
+def perform_verifiability_checks(invoice_data: Dict, confidences: ConfidenceIndex,
+                                 abs_tolerance: float = ABS_TOLERANCE, rel_tolerance: float = REL_TOLERANCE) -> Dict:
+    confidences = as_confidence_index(confidences)
     report = {
         "field_verification": {},
         "line_items_verification": [],
@@ -25,9 +47,10 @@ def perform_verifiability_checks(invoice_data: Dict, confidences: Dict) -> Dict:
                   not (isinstance(value, str) and not value.strip()))
         
         if present:
-            words = str(value).split() if isinstance(value, str) else [str(value)]
-            word_confs = [confidences.get(word, 0.9) for word in words if word in confidences]
-            confidence = np.mean(word_confs) if word_confs else 0.9
+            if isinstance(value, str):
+                confidence = confidences.text_confidence(value, 0.9)
+            else:
+                confidence = confidences.number_confidence(value, 0.9)
         else:
             confidence = 0.0
             
@@ -36,55 +59,62 @@ def perform_verifiability_checks(invoice_data: Dict, confidences: Dict) -> Dict:
             "present": present
         }
     
-    for i, item in enumerate(invoice_data.get("table_contents", [])):
-        try:
-            qty = float(item.get("quantity", 0.0))
-            unit_price = float(item.get("unit_price", 0.0))
-            total = float(item.get("total_amount", 0.0))
-            
-            calculated_total = round(qty * unit_price, 2)
-            check_passed = abs(calculated_total - total) <= 0.01
-            
-            desc = item.get("description", "")
-            hsn_sac = item.get("hsn_sac", "")
-            serial = item.get("serial_number", "")
-            
-            desc_words = desc.split() if desc != "Not Found" else []
-            hsn_words = hsn_sac.split() if hsn_sac != "Not Found" else []
-            serial_words = serial.split() if serial != "Not Found" else []
-            
-            desc_conf = np.mean([confidences.get(w, 0.9) for w in desc_words]) if desc_words else 0.9
-            hsn_conf = np.mean([confidences.get(w, 0.9) for w in hsn_words]) if hsn_words else 0.9
-            serial_conf = np.mean([confidences.get(w, 0.9) for w in serial_words]) if serial_words else 0.9
-            qty_conf = confidences.get(str(qty), 0.9) if qty != 0.0 else 0.9
-            price_conf = confidences.get(str(unit_price), 0.9) if unit_price != 0.0 else 0.9
-            total_conf = confidences.get(str(total), 0.9) if total != 0.0 else 0.9
-            
-            report["line_items_verification"].append({
-                "row": i+1,
-                "description_confidence": round(desc_conf, 2),
-                "hsn_sac_confidence": round(hsn_conf, 2),
-                "quantity_confidence": round(qty_conf, 2),
-                "unit_price_confidence": round(price_conf, 2),
-                "total_amount_confidence": round(total_conf, 2),
-                "serial_number_confidence": round(serial_conf, 2),
-                "line_total_check": {
-                    "calculated_value": calculated_total,
-                    "extracted_value": total,
-                    "check_passed": check_passed
-                }
-            })
-            
-            if not check_passed:
-                report["summary"]["issues"].append(
-                    f"Line {i+1} total mismatch: {total} vs {calculated_total}"
-                )
-        except Exception as e:
-            report["summary"]["issues"].append(f"Line {i+1} error: {str(e)}")
+    items = invoice_data.get("table_contents", [])
+    errors = {}
+    qty = _float_column(items, "quantity", errors)
+    unit_price = _float_column(items, "unit_price", errors)
+    total_errors = {}
+    total = _float_column(items, "total_amount", total_errors)
+    for i, message in total_errors.items():
+        errors.setdefault(i, message)
+    calculated = np.array([round(value, 2) for value in (qty * unit_price).tolist()], dtype=float)
+    passed = _within(calculated, total, abs_tolerance, rel_tolerance)
+    
+    for i, item in enumerate(items):
+        if i in errors:
+            report["summary"]["issues"].append(f"Line {i+1} error: {errors[i]}")
+            continue
+        
+        desc = item.get("description", "")
+        hsn_sac = item.get("hsn_sac", "")
+        serial = item.get("serial_number", "")
+        
+        desc_words = desc.split() if desc != "Not Found" else []
+        hsn_words = hsn_sac.split() if hsn_sac != "Not Found" else []
+        serial_words = serial.split() if serial != "Not Found" else []
+        
+        desc_conf = np.mean([confidences.token_confidence(w, 0.9) for w in desc_words]) if desc_words else 0.9
+        hsn_conf = np.mean([confidences.token_confidence(w, 0.9) for w in hsn_words]) if hsn_words else 0.9
+        serial_conf = np.mean([confidences.token_confidence(w, 0.9) for w in serial_words]) if serial_words else 0.9
+        qty_conf = confidences.number_confidence(qty[i], 0.9) if qty[i] != 0.0 else 0.9
+        price_conf = confidences.number_confidence(unit_price[i], 0.9) if unit_price[i] != 0.0 else 0.9
+        total_conf = confidences.number_confidence(total[i], 0.9) if total[i] != 0.0 else 0.9
+        check_passed = bool(passed[i])
+        
+        report["line_items_verification"].append({
+            "row": i+1,
+            "description_confidence": round(desc_conf, 2),
+            "hsn_sac_confidence": round(hsn_conf, 2),
+            "quantity_confidence": round(qty_conf, 2),
+            "unit_price_confidence": round(price_conf, 2),
+            "total_amount_confidence": round(total_conf, 2),
+            "serial_number_confidence": round(serial_conf, 2),
+            "line_total_check": {
+                "calculated_value": float(calculated[i]),
+                "extracted_value": float(total[i]),
+                "check_passed": check_passed
+            }
+        })
+        
+        if not check_passed:
+            report["summary"]["issues"].append(
+                f"Line {i+1} total mismatch: {float(total[i])} vs {float(calculated[i])}"
+            )
     
     try:
-        subtotal_calc = sum(float(item["total_amount"]) 
-                          for item in invoice_data.get("table_contents", []))
+        if total_errors:
+            raise ValueError(next(iter(total_errors.values())))
+        subtotal_calc = float(total.sum())
         subtotal_ext = float(invoice_data["totals"].get("subtotal", 0.0))
         discount = float(invoice_data["totals"].get("discount", 0.0))
         gst = float(invoice_data["totals"].get("gst", 0.0))
@@ -92,16 +122,16 @@ def perform_verifiability_checks(invoice_data: Dict, confidences: Dict) -> Dict:
         
         final_total_calc = round(subtotal_calc - discount + gst, 2)
         
-        subtotal_conf = confidences.get(str(subtotal_ext), 0.9) if subtotal_ext != 0.0 else 0.9
-        discount_conf = confidences.get(str(discount), 0.9) if discount != 0.0 else 0.9
-        gst_conf = confidences.get(str(gst), 0.9) if gst != 0.0 else 0.9
-        final_total_conf = confidences.get(str(final_total_ext), 0.9) if final_total_ext != 0.0 else 0.9
+        subtotal_conf = confidences.number_confidence(subtotal_ext, 0.9) if subtotal_ext != 0.0 else 0.9
+        discount_conf = confidences.number_confidence(discount, 0.9) if discount != 0.0 else 0.9
+        gst_conf = confidences.number_confidence(gst, 0.9) if gst != 0.0 else 0.9
+        final_total_conf = confidences.number_confidence(final_total_ext, 0.9) if final_total_ext != 0.0 else 0.9
         
         report["total_calculations_verification"] = {
             "subtotal_check": {
                 "calculated_value": round(subtotal_calc, 2),
                 "extracted_value": round(subtotal_ext, 2),
-                "check_passed": abs(subtotal_calc - subtotal_ext) <= 0.01,
+                "check_passed": bool(_within(subtotal_calc, subtotal_ext, abs_tolerance, rel_tolerance)),
                 "confidence": round(subtotal_conf, 2)
             },
             "discount_check": {
@@ -117,7 +147,7 @@ def perform_verifiability_checks(invoice_data: Dict, confidences: Dict) -> Dict:
             "final_total_check": {
                 "calculated_value": round(final_total_calc, 2),
                 "extracted_value": round(final_total_ext, 2),
-                "check_passed": abs(final_total_calc - final_total_ext) <= 0.01,
+                "check_passed": bool(_within(final_total_calc, final_total_ext, abs_tolerance, rel_tolerance)),
                 "confidence": round(final_total_conf, 2)
             }
         }
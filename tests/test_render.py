@@ -0,0 +1,13 @@
+import numpy as np
+from render import MAX_DPI, MIN_DPI, choose_dpi, glyph_metrics
+
+def test_unmeasurable_page_falls_back_to_default_dpi():
+    blank = np.full((1000, 800, 3), 255, dtype=np.uint8)
+    glyph_height, _ = glyph_metrics(blank)
+    assert glyph_height is None
+    assert choose_dpi(glyph_height, 100, 200) == 200
+
+def test_measured_glyphs_are_clamped_to_dpi_range():
+    assert choose_dpi(7.0, 100, 200) == 200
+    assert choose_dpi(1.0, 100, 200) == MAX_DPI
+    assert choose_dpi(100.0, 100, 200) == MIN_DPI
@@ -0,0 +1,18 @@
+from verification import perform_verifiability_checks
+
+def _invoice(items):
+    return {"general_information": {}, "totals": {}, "table_contents": items}
+
+def test_line_total_rounds_half_cent_like_python_round():
+    items = [{"quantity": 5.0, "unit_price": 9.919, "total_amount": 49.59}]
+    report = perform_verifiability_checks(_invoice(items), {})
+    check = report["line_items_verification"][0]["line_total_check"]
+    assert check["calculated_value"] == 49.59
+    assert check["check_passed"]
+    assert not any(issue.startswith("Line 1")  for issue in report["summary"]["issues"])
+
+def test_line_total_mismatch_is_reported():
+    items = [{"quantity": 5.0, "unit_price": 9.919, "total_amount": 49.62}]
+    report = perform_verifiability_checks(_invoice(items), {})
+    assert not report["line_items_verification"][0]["line_total_check"]["check_passed"]
+    assert "Line 1 total mismatch: 49.62 vs 49.59" in report["summary"]["issues"]